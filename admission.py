@@ -0,0 +1,150 @@
+"""
+Admission control with priority classes and deadline-based load shedding.
+
+Handler work is queued in one bounded queue per priority class and run by a
+fixed pool of worker threads that always take the most urgent job first:
+commands, then /search and inline queries, then free-text searches. Search
+classes may occupy at most ADMISSION_SEARCH_WORKERS workers together, so the
+remaining workers stay free for commands however many searches are waiting.
+
+A job is shed instead of run when its queue is full or when it waited longer
+than its class deadline; its on_shed callback then tells the user to try
+again.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+COMMAND, SEARCH, ECHO = 0, 1, 2
+PRIORITY_NAMES = ('command', 'search', 'echo')
+
+ADMISSION_WORKERS = int(os.environ.get('ADMISSION_WORKERS', '8'))
+
+# Workers /search and free-text searches may occupy together
+ADMISSION_SEARCH_WORKERS = int(os.environ.get('ADMISSION_SEARCH_WORKERS', '6'))
+
+# Per class, in COMMAND, SEARCH, ECHO order
+ADMISSION_QUEUE_SIZES = tuple(int(size) for size in os.environ.get('ADMISSION_QUEUE_SIZES', '500,100,100').split(','))
+ADMISSION_DEADLINES = tuple(float(seconds) for seconds in os.environ.get('ADMISSION_DEADLINES', '15,8,5').split(','))
+
+def telebot_priority(event):
+    """
+    Pick the priority class of an incoming telebot message, inline query or callback
+
+    Args:
+        event: telebot.types.Message, InlineQuery or CallbackQuery
+
+    Returns:
+        int: ECHO for free text, SEARCH for /search and inline queries,
+            COMMAND otherwise
+    """
+    from telebot import types
+
+    # Inline queries run several searches per keystroke
+    if isinstance(event, types.InlineQuery):
+        return SEARCH
+    text = getattr(event, 'text', None) if isinstance(event, types.Message) else None
+    if text is None:
+        return COMMAND
+    if not text.startswith('/'):
+        return ECHO
+    command = text.split(maxsplit=1)[0][1:].split('@')[0].lower()
+    return SEARCH if command == 'search' else COMMAND
+
+class AdmissionController:
+    """Priority queues drained by a bounded pool of worker threads"""
+
+    def __init__(self, workers=ADMISSION_WORKERS, search_workers=ADMISSION_SEARCH_WORKERS,
+                 queue_sizes=ADMISSION_QUEUE_SIZES, deadlines=ADMISSION_DEADLINES):
+        self.workers = workers
+        self.search_workers = min(search_workers, workers)
+        self.deadlines = deadlines
+        # Jobs are (enqueued_at, context, func, args, on_shed)
+        self._queues = [deque(maxlen=size) for size in queue_sizes]
+        self._busy = [0] * len(PRIORITY_NAMES)
+        self._ready = threading.Condition()
+        for number in range(workers):
+            threading.Thread(target=self._work, name=f'admission-{number}', daemon=True).start()
+
+        for priority, name in enumerate(PRIORITY_NAMES):
+            metrics.register_gauge(f'admission.queued.{name}', lambda priority=priority: len(self._queues[priority]))
+            metrics.register_gauge(f'admission.busy.{name}', lambda priority=priority: self._busy[priority])
+
+    def submit(self, priority, func, *args, on_shed=None):
+        """
+        Queue a job
+
+        Args:
+            priority (int): COMMAND, SEARCH or ECHO
+            func (callable): Called as func(*args) on a worker thread, in a
+                copy of the caller's context variables
+            on_shed (callable): Called without arguments if the job is dropped
+
+        Returns:
+            bool: True if the job was queued, False if its queue was full
+        """
+        name = PRIORITY_NAMES[priority]
+        with self._ready:
+            queue = self._queues[priority]
+            admitted = len(queue) < queue.maxlen
+            if admitted:
+                queue.append((time.monotonic(), contextvars.copy_context(), func, args, on_shed))
+                self._ready.notify()
+
+        if not admitted:
+            metrics.incr(f'admission.rejected.{name}')
+            self._shed(on_shed)
+            return False
+        metrics.incr(f'admission.admitted.{name}')
+        return True
+
+    def pending(self):
+        """Return the number of queued jobs of all classes"""
+        return sum(len(queue) for queue in self._queues)
+
+    def _next_job(self):
+        # Caller holds self._ready
+        searching = self._busy[SEARCH] + self._busy[ECHO]
+        for priority, queue in enumerate(self._queues):
+            if queue and (priority == COMMAND or searching < self.search_workers):
+                return priority, queue.popleft()
+        return None
+
+    def _work(self):
+        while True:
+            with self._ready:
+                picked = self._next_job()
+                while picked is None:
+                    self._ready.wait()
+                    picked = self._next_job()
+                priority, (enqueued_at, context, func, args, on_shed) = picked
+                self._busy[priority] += 1
+
+            try:
+                if time.monotonic() - enqueued_at > self.deadlines[priority]:
+                    metrics.incr(f'admission.shed.{PRIORITY_NAMES[priority]}')
+                    context.run(self._shed, on_shed)
+                else:
+                    context.run(func, *args)
+            except Exception as e:
+                logger.exception(f"Error in {PRIORITY_NAMES[priority]} job: {e}")
+            finally:
+                with self._ready:
+                    self._busy[priority] -= 1
+                    # A finished search may unblock a search waiting for the limit
+                    self._ready.notify()
+
+    def _shed(self, on_shed):
+        if on_shed is None:
+            return
+        try:
+            on_shed()
+        except Exception as e:
+            logger.error(f"Could not report a shed job: {e}")
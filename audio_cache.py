@@ -0,0 +1,232 @@
+"""
+Recitation audio delivery with a persistent Telegram file_id cache.
+
+Clips are read from a local directory (one mp3 per verse, named SSSAAA.mp3
+as in the everyayah.com dumps). Each clip is uploaded to Telegram only once;
+the returned file_id is reused for every later send and saved to a JSON file
+by the shared flusher (see flusher.py), so a burst of uploads costs one write.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+
+from telebot.apihelper import ApiTelegramException
+
+import flusher
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DIR = os.environ.get('AUDIO_DIR', 'audio')
+AUDIO_CACHE_FILE = os.environ.get('AUDIO_CACHE_FILE', 'audio_file_ids.json')
+
+# Seconds between writes of the cache while new file_ids arrive
+AUDIO_FLUSH_INTERVAL = float(os.environ.get('AUDIO_FLUSH_INTERVAL', '5'))
+
+def audio_key(surah, ayah):
+    """
+    Build the cache key for a verse clip
+
+    Args:
+        surah (int): Surah number
+        ayah (int): Ayah number
+
+    Returns:
+        str: Key in "surah:ayah" form
+    """
+    return f"{surah}:{ayah}"
+
+def audio_filename(surah, ayah):
+    """
+    Build the file name of a verse clip (e.g. 002255.mp3)
+
+    Args:
+        surah (int): Surah number
+        ayah (int): Ayah number
+
+    Returns:
+        str: File name inside the audio directory
+    """
+    return f"{surah:03d}{ayah:03d}.mp3"
+
+def rejects_file_id(error):
+    """
+    Check whether Telegram refused a request because of its file_id
+
+    Args:
+        error (ApiTelegramException): Error raised by a send
+
+    Returns:
+        bool: True for a bad request naming the file identifier
+    """
+    description = (error.description or '').lower()
+    return error.error_code == 400 and ('file identifier' in description or 'file_id' in description)
+
+class AudioCache:
+    """Maps verse keys to Telegram file_ids and persists them on disk"""
+
+    def __init__(self, cache_file=AUDIO_CACHE_FILE, audio_dir=AUDIO_DIR):
+        self.cache_file = cache_file
+        self.audio_dir = audio_dir
+        self._file_ids = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._upload_locks = {}
+        self._load()
+        flusher.register(self.flush, AUDIO_FLUSH_INTERVAL)
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                self._file_ids = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read audio cache {self.cache_file}: {e}")
+            self._file_ids = {}
+
+    def flush(self):
+        """Write the cache to disk if it changed"""
+        # Serializes writers so an older cache never replaces a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                file_ids = dict(self._file_ids)
+                self._dirty = False
+
+            # Write to a temporary file first so a crash never leaves a truncated cache
+            tmp_path = self.cache_file + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(file_ids, f)
+                os.replace(tmp_path, self.cache_file)
+            except OSError as e:
+                logger.error(f"Could not save audio cache {self.cache_file}: {e}")
+
+    def __len__(self):
+        return len(self._file_ids)
+
+    def get(self, key):
+        """Return the cached file_id for a key, or None"""
+        return self._file_ids.get(key)
+
+    def remember(self, key, file_id):
+        """Store a file_id for a key; it is saved with the next flush"""
+        with self._lock:
+            self._file_ids[key] = file_id
+            self._dirty = True
+
+    def forget(self, key):
+        """Drop a file_id that Telegram no longer accepts"""
+        with self._lock:
+            if self._file_ids.pop(key, None) is not None:
+                self._dirty = True
+
+    def clip_path(self, surah, ayah):
+        """
+        Return the local path of a verse clip
+
+        Args:
+            surah (int): Surah number
+            ayah (int): Ayah number
+
+        Returns:
+            str: Path to the clip, or None if it does not exist
+        """
+        path = os.path.join(self.audio_dir, audio_filename(surah, ayah))
+        return path if os.path.exists(path) else None
+
+    def _upload_lock(self, key):
+        with self._lock:
+            return self._upload_locks.setdefault(key, threading.Lock())
+
+    def send_audio(self, bot, chat_id, surah, ayah, **kwargs):
+        """
+        Send a verse clip, uploading it only if no file_id is cached yet
+
+        Args:
+            bot (telebot.TeleBot): Bot used for sending
+            chat_id (int): Target chat
+            surah (int): Surah number
+            ayah (int): Ayah number
+            **kwargs: Extra arguments passed to bot.send_audio
+
+        Returns:
+            telebot.types.Message: Sent message, or None if no clip exists
+        """
+        key = audio_key(surah, ayah)
+        file_id = self.get(key)
+        if file_id:
+            try:
+                return bot.send_audio(chat_id, file_id, **kwargs)
+            except ApiTelegramException as e:
+                # Timeouts and other failures say nothing about the file_id
+                if not rejects_file_id(e):
+                    raise
+                logger.warning(f"Cached file_id for {key} rejected, uploading again: {e}")
+                self.forget(key)
+
+        # Serialize uploads per clip so concurrent requests upload it only once
+        with self._upload_lock(key):
+            file_id = self.get(key)
+            if file_id:
+                return bot.send_audio(chat_id, file_id, **kwargs)
+
+            path = self.clip_path(surah, ayah)
+            if not path:
+                return None
+
+            kwargs.setdefault('title', f"Quran {key}")
+            with open(path, 'rb') as audio:
+                sent = bot.send_audio(chat_id, audio, **kwargs)
+            self.remember(key, sent.audio.file_id)
+            return sent
+
+    def preload(self, bot, chat_id, surahs):
+        """
+        Upload every local clip of the given surahs that has no file_id yet
+
+        The clips are sent to chat_id (usually a private storage channel)
+        so later user requests are served from the cache.
+
+        Args:
+            bot (telebot.TeleBot): Bot used for uploading
+            chat_id (int): Storage chat receiving the uploads
+            surahs (list): Surah numbers to preload
+
+        Returns:
+            int: Number of clips uploaded
+        """
+        uploaded = 0
+        for surah in surahs:
+            pattern = os.path.join(self.audio_dir, f"{surah:03d}[0-9][0-9][0-9].mp3")
+            for path in sorted(glob.glob(pattern)):
+                ayah = int(os.path.basename(path)[3:6])
+                if self.get(audio_key(surah, ayah)):
+                    continue
+                if self.send_audio(bot, chat_id, surah, ayah, disable_notification=True):
+                    uploaded += 1
+        return uploaded
+
+if __name__ == "__main__":
+    import sys
+    import telebot
+
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+
+    token = os.environ.get('TELEGRAM_TOKEN')
+    storage_chat = os.environ.get('AUDIO_STORAGE_CHAT_ID')
+    if not token or not storage_chat:
+        logger.error("TELEGRAM_TOKEN and AUDIO_STORAGE_CHAT_ID environment variables must be set!")
+        exit(1)
+
+    # Usage: python audio_cache.py 1 36 67 112
+    surahs = [int(arg) for arg in sys.argv[1:]] or [1, 36, 67, 112, 113, 114]
+    count = AudioCache().preload(telebot.TeleBot(token), int(storage_chat), surahs)
+    logger.info(f"Preloaded {count} audio clips")
@@ -0,0 +1,145 @@
+"""
+Prefix completion over the vocabulary of a corpus language.
+
+Terms are kept in one sorted list with a parallel array of corpus
+frequencies, so the terms sharing a prefix form a contiguous slice found by
+two binary searches. The best completions of every one- and two-letter
+prefix (whose slices are large) are precomputed; longer prefixes pick the
+most frequent terms of their small slice directly.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+
+from search_index import QuerySyntaxError, parse_query, query_terms, tokenize
+from snapshot import current, register
+
+COMPLETIONS_LIMIT = 10
+_PRECOMPUTED_PREFIX_LENGTH = 2
+
+class Autocompleter:
+    """Frequency-weighted prefix completion"""
+
+    def __init__(self, frequencies):
+        """
+        Args:
+            frequencies (dict): Term -> number of occurrences in the corpus
+        """
+        self.terms = sorted(frequencies)
+        self.frequencies = array('I', (frequencies[term] for term in self.terms))
+        self._precomputed = {}
+
+        prefixes = {term[:length] for term in self.terms for length in range(1, _PRECOMPUTED_PREFIX_LENGTH + 1)}
+        for prefix in prefixes:
+            self._precomputed[prefix] = self._scan(prefix, COMPLETIONS_LIMIT)
+
+    @classmethod
+    def from_index(cls, index):
+        """Build from a search_index.PositionalIndex"""
+        return cls({term: len(postings.positions) for term, postings in index.postings.items()})
+
+    def _range(self, prefix):
+        low = bisect_left(self.terms, prefix)
+        high = bisect_left(self.terms, prefix + '\U0010ffff', low)
+        return low, high
+
+    def _scan(self, prefix, limit):
+        low, high = self._range(prefix)
+        best = heapq.nlargest(limit, range(low, high), key=self.frequencies.__getitem__)
+        return [(self.terms[i], self.frequencies[i]) for i in best]
+
+    def complete(self, prefix, limit=COMPLETIONS_LIMIT):
+        """
+        Get the most frequent terms starting with a prefix
+
+        Args:
+            prefix (str): Normalized prefix
+            limit (int): Maximum number of completions
+
+        Returns:
+            list: (term, frequency) pairs, most frequent first
+        """
+        if not prefix:
+            return []
+        precomputed = self._precomputed.get(prefix)
+        if precomputed is not None and limit <= COMPLETIONS_LIMIT:
+            return precomputed[:limit]
+        if len(prefix) <= _PRECOMPUTED_PREFIX_LENGTH and limit <= COMPLETIONS_LIMIT:
+            return []
+        return self._scan(prefix, limit)
+
+    def frequency(self, term):
+        """Return how often a term occurs, or 0"""
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self.frequencies[i]
+        return 0
+
+    def suggest(self, term, limit=3):
+        """
+        Suggest known terms for an unknown one ("did you mean")
+
+        The term is shortened one letter at a time until some vocabulary
+        terms share the remaining prefix (at least three letters).
+
+        Args:
+            term (str): Normalized term
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Suggested terms, most frequent first
+        """
+        if self.frequency(term):
+            return []
+        for length in range(len(term), 2, -1):
+            completions = self.complete(term[:length], limit)
+            if completions:
+                return [completion for completion, _ in completions]
+        return []
+
+def _build_autocompleter(snapshot, language):
+    index = snapshot.engine.index(language)
+    if index is None:
+        return None
+    return Autocompleter.from_index(index)
+
+register('autocomplete', _build_autocompleter)
+
+def get_autocompleter(language):
+    """
+    Return the completer of a language, building it on first use
+
+    Args:
+        language (str): Language code
+
+    Returns:
+        Autocompleter: Completer, or None if the language has no local index
+    """
+    return current().get('autocomplete', language)
+
+def did_you_mean(query, language):
+    """
+    Suggest corrected queries for a query without results
+
+    Args:
+        query (str): Search query
+        language (str): Language code
+
+    Returns:
+        list: Suggested words, empty when nothing fits
+    """
+    completer = get_autocompleter(language)
+    if completer is None:
+        return []
+
+    try:
+        terms = query_terms(parse_query(query))
+    except QuerySyntaxError:
+        terms = tokenize(query)
+
+    suggestions = []
+    for term in terms:
+        for suggestion in completer.suggest(term):
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
+    return suggestions[:5]
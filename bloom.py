@@ -0,0 +1,157 @@
+"""
+Bloom filter over the normalized corpus vocabulary.
+
+Greetings, emoji and words that never occur in any translation are answered
+with "no results" straight away: if none of the query terms can be in the
+vocabulary, neither the local index nor the remote API is consulted.
+The filter is saved as data/vocabulary.bloom and rebuilt when a text column
+is newer than the saved file.
+"""
+import hashlib
+import logging
+import math
+import os
+import struct
+
+from search_index import QuerySyntaxError, parse_query, query_terms, tokenize
+from snapshot import current, register
+
+logger = logging.getLogger(__name__)
+
+BLOOM_ERROR_RATE = float(os.environ.get('BLOOM_ERROR_RATE', '0.01'))
+
+_HEADER = struct.Struct('<QI')
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, size, hash_count, bits=None):
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=BLOOM_ERROR_RATE):
+        """
+        Create an empty filter sized for a number of items
+
+        Args:
+            capacity (int): Expected number of items
+            error_rate (float): Target false positive rate
+
+        Returns:
+            BloomFilter: Empty filter
+        """
+        capacity = max(capacity, 1)
+        size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(size / capacity * math.log(2)))
+        return cls(size, hash_count)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path):
+        """Write the filter to a file"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(self.size, self.hash_count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a filter written by save()"""
+        with open(path, 'rb') as f:
+            size, hash_count = _HEADER.unpack(f.read(_HEADER.size))
+            bits = bytearray(f.read())
+        if len(bits) != (size + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        return cls(size, hash_count, bits)
+
+def build_vocabulary_filter(corpus):
+    """
+    Build a filter from every term of every text column
+
+    Args:
+        corpus (corpus.Corpus): Local corpus
+
+    Returns:
+        BloomFilter: Filter, or None if the corpus has no columns
+    """
+    vocabulary = set()
+    for language in corpus.store.languages() + ['ar']:
+        column = corpus.store.column(language)
+        if column is None:
+            continue
+        for doc in range(len(column)):
+            vocabulary.update(tokenize(column.text(doc)))
+    if not vocabulary:
+        return None
+
+    bloom = BloomFilter.for_capacity(len(vocabulary))
+    for term in vocabulary:
+        bloom.add(term)
+    logger.info(f"Built vocabulary filter for {len(vocabulary)} terms ({len(bloom.bits)} bytes)")
+    return bloom
+
+def _load_vocabulary_filter(snapshot, key=None):
+    corpus = snapshot.corpus
+    if not corpus.is_available():
+        return None
+    path = os.path.join(corpus.data_dir, 'vocabulary.bloom')
+    if os.path.exists(path) and not corpus.store.changed_since(path):
+        return BloomFilter.load(path)
+
+    bloom = build_vocabulary_filter(corpus)
+    if bloom is not None:
+        try:
+            bloom.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save vocabulary filter {path}: {e}")
+    return bloom
+
+register('bloom', _load_vocabulary_filter)
+
+def get_vocabulary_filter():
+    """
+    Return the vocabulary filter, loading or building it on first use
+
+    Returns:
+        BloomFilter: Filter, or None if there is no local corpus
+    """
+    return current().get('bloom')
+
+def is_hopeless(query):
+    """
+    Check whether a query certainly has no results in the local corpus
+
+    Only meaningful when the search itself runs against the local corpus;
+    a remote search may match terms the local columns do not contain.
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        bool: True if no positive query term can occur in the corpus;
+            False when unsure or when there is no local corpus
+    """
+    bloom = get_vocabulary_filter()
+    if bloom is None or not tokenize(query):
+        # Queries without terms (emoji, punctuation) get the parser's error instead
+        return False
+    try:
+        terms = query_terms(parse_query(query))
+    except QuerySyntaxError:
+        # Malformed queries still go through the search for a proper error
+        return False
+    return bool(terms) and not any(term in bloom for term in terms)
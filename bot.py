@@ -4,17 +4,21 @@ from telebot import types
 import os
 
 from quran_service import QuranService
+from surahs import get_surah
 from utilities import (
     format_verse_message, format_search_results, format_help_message,
     format_start_message, parse_verse_reference, DEFAULT_RESULTS_LIMIT
 )
 from config import TELEGRAM_TOKEN
+import http_session
 
 def initialize_bot():
     """Initialize and configure the Telegram bot"""
     if not TELEGRAM_TOKEN:
         raise ValueError("Telegram bot token is not set. Please set the TELEGRAM_TOKEN environment variable.")
     
+    # All handler threads share one pooled keep-alive connection to the Bot API
+    http_session.install()
     bot = telebot.TeleBot(TELEGRAM_TOKEN)
     
     # Start command handler
@@ -105,11 +109,12 @@ def initialize_bot():
             # Send typing action
             bot.send_chat_action(message.chat.id, 'typing')
             
-            # Get surah info
-            surah_info = QuranService.get_surah_info(surah_number)
-            if not surah_info:
+            # Surah metadata is static and comes from the built-in table
+            surah_info = get_surah(surah_number)
+            
+            if start_verse < 1 or start_verse > surah_info.verses_count:
                 bot.send_message(message.chat.id, 
-                                f"Sorry, couldn't find information for Surah {surah_number}.")
+                                f"Surah {surah_number} has {surah_info.verses_count} verses.")
                 return
             
             # Get verses
@@ -121,9 +126,9 @@ def initialize_bot():
             
             # Send surah info
             surah_message = (
-                f"🕌 *Surah {surah_info['englishName']} ({surah_info['name']})*\n"
-                f"Number {surah_info['number']} • {surah_info['numberOfAyahs']} verses • "
-                f"Revealed in {surah_info['revelationType']}\n\n"
+                f"🕌 *Surah {surah_info.name_simple} ({surah_info.name_arabic})*\n"
+                f"Number {surah_info.number} • {surah_info.verses_count} verses • "
+                f"Revealed in {surah_info.revelation_place.capitalize()}\n\n"
             )
             bot.send_message(message.chat.id, surah_message, parse_mode='Markdown')
             
@@ -3,14 +3,13 @@ This is the main entry point for the Telegram bot.
 It imports the telebot_main module and runs the bot.
 """
 import logging
+import log_setup
 import os
-from telebot_main import bot
+from telebot_main import bot, start_warm_up
+import snapshot
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Check if the Telegram token is set
@@ -20,6 +19,10 @@ if not os.environ.get('TELEGRAM_TOKEN'):
 
 if __name__ == "__main__":
     logger.info("Starting Qur'on bot using PyTelegramBotAPI")
+    # SIGHUP reloads the corpus without stopping polling
+    snapshot.install_signal_handler()
+    # Popular verses and queries are ready before the first requests arrive
+    start_warm_up()
     try:
         # Start the bot
         bot.infinity_polling()
@@ -0,0 +1,123 @@
+"""
+Word concordance: how often each term occurs, in how many verses and in
+which surahs.
+
+The concordance of a language is computed once from its search index and
+saved as data/concordance/<lang>.json, so a /stats lookup is a single dict
+access. The file is rebuilt when its column is newer than it. Per-surah
+counts are stored sparsely as a flat array of (surah, count) pairs.
+"""
+import json
+import logging
+import os
+from array import array
+
+from snapshot import current, register
+from surahs import verse_ref
+
+logger = logging.getLogger(__name__)
+
+class WordStats:
+    """Occurrence counts of one term"""
+
+    __slots__ = ('total', 'verses', 'surah_counts')
+
+    def __init__(self, total, verses, surah_counts):
+        self.total = total
+        self.verses = verses
+        self.surah_counts = surah_counts
+
+    def per_surah(self):
+        """
+        Get the occurrences per surah
+
+        Returns:
+            list: (surah, count) pairs, most occurrences first
+        """
+        pairs = zip(self.surah_counts[::2], self.surah_counts[1::2])
+        return sorted(pairs, key=lambda pair: (-pair[1], pair[0]))
+
+def build_concordance(index):
+    """
+    Count every term of a positional index per surah
+
+    Args:
+        index (search_index.PositionalIndex): Index of one language
+
+    Returns:
+        dict: Term -> WordStats
+    """
+    concordance = {}
+    for term, postings in index.postings.items():
+        counts = {}
+        for i, doc in enumerate(postings.docs):
+            surah = verse_ref(doc)[0]
+            counts[surah] = counts.get(surah, 0) + postings.offsets[i + 1] - postings.offsets[i]
+        flat = array('H')
+        for surah in sorted(counts):
+            flat.extend((surah, counts[surah]))
+        concordance[term] = WordStats(len(postings.positions), len(postings.docs), flat)
+    return concordance
+
+def save_concordance(concordance, path):
+    """Write a concordance as JSON: term -> [total, verses, surah, count, ...]"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {term: [stats.total, stats.verses, *stats.surah_counts] for term, stats in concordance.items()},
+            f, ensure_ascii=False, separators=(',', ':')
+        )
+    os.replace(tmp_path, path)
+
+def load_concordance(path):
+    """Read a concordance written by save_concordance"""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    return {term: WordStats(values[0], values[1], array('H', values[2:])) for term, values in raw.items()}
+
+def _load_concordance(snapshot, language):
+    path = os.path.join(snapshot.corpus.data_dir, 'concordance', f"{language}.json")
+    # A column edited without ingest.py makes the saved counts stale
+    if os.path.exists(path) and not snapshot.corpus.store.changed_since(path, [language]):
+        return load_concordance(path)
+
+    index = snapshot.engine.index(language)
+    if index is None:
+        return None
+    concordance = build_concordance(index)
+    try:
+        save_concordance(concordance, path)
+    except OSError as e:
+        logger.warning(f"Could not save concordance {path}: {e}")
+    return concordance
+
+register('concordance', _load_concordance)
+
+def get_concordance(language):
+    """
+    Return the concordance of a language, loading or building it on first use
+
+    Args:
+        language (str): Language code
+
+    Returns:
+        dict: Term -> WordStats, or None if the language has no local corpus
+    """
+    return current().get('concordance', language)
+
+def word_stats(word, language):
+    """
+    Look up the statistics of a word
+
+    Args:
+        word (str): Normalized word
+        language (str): Language code
+
+    Returns:
+        WordStats: Statistics, or None if the word or the corpus is missing
+    """
+    concordance = get_concordance(language)
+    if concordance is None:
+        return None
+    return concordance.get(word)
@@ -0,0 +1,310 @@
+"""
+Local verse corpus stored as one column per language.
+
+Every language (the Arabic text is just the "ar" column) lives in
+data/text/<lang>.txt with one verse per line in canonical order. A column is
+loaded on first use into a single bytes blob plus an array of line offsets,
+so verses are addressed by their small integer index instead of per-verse
+dicts, and adding a language costs one blob rather than 6236 objects.
+"""
+import json
+import logging
+import os
+import threading
+from array import array
+
+from surahs import TOTAL_VERSES, get_surah, verse_index, verse_ref
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get('QURAN_DATA_DIR', 'data')
+DEFAULT_LANGUAGE = os.environ.get('DEFAULT_LANGUAGE', 'uz')
+ARABIC = 'ar'
+
+class TextColumn:
+    """All verses of one language in a contiguous, offset-indexed blob"""
+
+    __slots__ = ('language', 'blob', 'offsets')
+
+    def __init__(self, language, blob, offsets):
+        self.language = language
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_file(cls, language, path):
+        """
+        Load a column file with one verse per line
+
+        Args:
+            language (str): Language code of the column
+            path (str): Path to the UTF-8 text file
+
+        Returns:
+            TextColumn: Loaded column
+        """
+        with open(path, 'rb') as f:
+            blob = f.read()
+        if blob and not blob.endswith(b'\n'):
+            blob += b'\n'
+
+        # offsets[i] is where verse i starts; offsets[i + 1] - 1 is its newline
+        offsets = array('I', [0])
+        position = blob.find(b'\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = blob.find(b'\n', position + 1)
+
+        if len(offsets) - 1 != TOTAL_VERSES:
+            raise ValueError(f"{path} has {len(offsets) - 1} verses, expected {TOTAL_VERSES}")
+        return cls(language, blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def text(self, index):
+        """Return the text of the verse with the given global index"""
+        return self.blob[self.offsets[index]:self.offsets[index + 1] - 1].decode('utf-8')
+
+class Verse:
+    """
+    One verse as an index into the text columns
+
+    Texts are decoded from the columns when read, so a record costs a few
+    pointers instead of a dict with four strings. Records also answer the
+    read-only dict interface (get, [], in) that the formatters in utils.py
+    and QuranAPI results use.
+    """
+
+    __slots__ = ('index', 'surah_name', 'arabic', 'translation')
+
+    FIELDS = ('verse_key', 'surah_name', 'text_arabic', 'text_translation')
+
+    def __init__(self, index, arabic, translation):
+        self.index = index
+        self.surah_name = get_surah(verse_ref(index)[0]).name_simple
+        self.arabic = arabic
+        self.translation = translation
+
+    def __repr__(self):
+        return f"Verse({self.verse_key})"
+
+    @property
+    def verse_key(self):
+        surah, ayah = verse_ref(self.index)
+        return f"{surah}:{ayah}"
+
+    @property
+    def text_arabic(self):
+        return self.arabic.text(self.index) if self.arabic else ''
+
+    @property
+    def text_translation(self):
+        return self.translation.text(self.index) if self.translation else ''
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        """Read a field like dict.get"""
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def as_dict(self):
+        """Convert to a plain verse dict"""
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+class TranslationStore:
+    """Lazily loads text columns from the data directory"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.text_dir = os.path.join(data_dir, 'text')
+        self._columns = {}
+        # Languages whose column failed to load; a reload builds a new store
+        self._broken = set()
+        self._lock = threading.Lock()
+
+    def languages(self):
+        """
+        List the languages available on disk
+
+        Returns:
+            list: Language codes, Arabic excluded
+        """
+        if not os.path.isdir(self.text_dir):
+            return []
+        return sorted(
+            name[:-4] for name in os.listdir(self.text_dir)
+            if name.endswith('.txt') and name[:-4] != ARABIC
+        )
+
+    def has_language(self, language):
+        """Check whether a column file exists for a language"""
+        return os.path.exists(os.path.join(self.text_dir, f"{language}.txt"))
+
+    def changed_since(self, path, languages=None):
+        """
+        Check whether column files were modified after a derived file was saved
+
+        Args:
+            path (str): Derived file, e.g. a saved index or matrix
+            languages (list): Columns the file depends on, or None for all
+
+        Returns:
+            bool: True if any of the columns is newer than path
+        """
+        saved = os.path.getmtime(path)
+        if languages is None:
+            names = os.listdir(self.text_dir) if os.path.isdir(self.text_dir) else []
+        else:
+            names = [f"{language}.txt" for language in languages]
+        for name in names:
+            column_path = os.path.join(self.text_dir, name)
+            if os.path.exists(column_path) and os.path.getmtime(column_path) > saved:
+                return True
+        return False
+
+    def loaded_languages(self):
+        """Return the languages whose columns are already in memory"""
+        return list(self._columns)
+
+    def column(self, language):
+        """
+        Get the column of a language, loading it on first use
+
+        Args:
+            language (str): Language code
+
+        Returns:
+            TextColumn: Column, or None if the language is not available
+        """
+        column = self._columns.get(language)
+        if column is not None:
+            return column
+
+        with self._lock:
+            column = self._columns.get(language)
+            if column is None:
+                path = os.path.join(self.text_dir, f"{language}.txt")
+                if language in self._broken or not os.path.exists(path):
+                    return None
+                try:
+                    column = TextColumn.from_file(language, path)
+                except (OSError, ValueError) as e:
+                    # A damaged column makes its language unavailable instead of failing every handler
+                    logger.error(f"Could not load {language} column: {e}")
+                    self._broken.add(language)
+                    return None
+                self._columns[language] = column
+                logger.info(f"Loaded {language} column ({len(column.blob)} bytes)")
+        return column
+
+class Corpus:
+    """Verse lookups against the local columns"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.store = TranslationStore(data_dir)
+
+    def is_available(self):
+        """Check whether the Arabic column exists locally"""
+        return self.store.has_language(ARABIC)
+
+    def verse_at(self, index, language=DEFAULT_LANGUAGE):
+        """
+        Build verse data for a global verse index
+
+        Args:
+            index (int): Global verse index
+            language (str): Translation language
+
+        Returns:
+            Verse: Verse record accepted by utils.format_verse_message, or
+                None if the corpus is not available
+        """
+        arabic = self.store.column(ARABIC)
+        if arabic is None:
+            return None
+        translation = self.store.column(language) or self.store.column(DEFAULT_LANGUAGE)
+
+        return Verse(index, arabic, translation)
+
+    def get_verse(self, surah, ayah, language=DEFAULT_LANGUAGE):
+        """
+        Get a single verse
+
+        Args:
+            surah (int): Surah number
+            ayah (int): Ayah number
+            language (str): Translation language
+
+        Returns:
+            Verse: Verse record, or None if missing
+        """
+        index = verse_index(surah, ayah)
+        if index is None:
+            return None
+        return self.verse_at(index, language)
+
+    def get_verses(self, references, language=DEFAULT_LANGUAGE):
+        """
+        Resolve many verse ranges in one pass over the columns
+
+        Args:
+            references (list): (surah, first_ayah, last_ayah) tuples as
+                returned by utils.parse_verse_references
+            language (str): Translation language
+
+        Returns:
+            list: Verse records in request order, or None if the corpus
+                is not available
+        """
+        arabic = self.store.column(ARABIC)
+        if arabic is None:
+            return None
+        translation = self.store.column(language) or self.store.column(DEFAULT_LANGUAGE)
+
+        verses = []
+        for surah, first, last in references:
+            start = verse_index(surah, first)
+            verses.extend(Verse(index, arabic, translation) for index in range(start, start + last - first + 1))
+        return verses
+
+class LanguagePreferences:
+    """Per-user translation language, persisted to a JSON file"""
+
+    def __init__(self, path=os.environ.get('USER_LANGUAGES_FILE', 'user_languages.json')):
+        self.path = path
+        self._languages = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._languages = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read language preferences {path}: {e}")
+
+    def get(self, user_id, default=DEFAULT_LANGUAGE):
+        """Return the language chosen by a user, or the default"""
+        return self._languages.get(str(user_id), default)
+
+    def set(self, user_id, language):
+        """Store the language chosen by a user"""
+        with self._lock:
+            self._languages[str(user_id)] = language
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._languages, f)
+            os.replace(tmp_path, self.path)
+
+def get_corpus():
+    """Return the corpus of the current snapshot (see snapshot.py)"""
+    from snapshot import current
+    return current().corpus
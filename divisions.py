@@ -0,0 +1,165 @@
+"""
+Juz, hizb and mushaf page boundaries.
+
+Each division is stored as an array of the global verse indexes where its
+parts start, so the verses of part N are the slice between two entries and
+the part containing a verse is found with one bisect. The 30 juz starts are
+built in; hizb and page starts depend on the mushaf edition and are read
+from data/divisions.json, which ingest.py writes from the tanzil metadata:
+
+    python ingest.py --divisions quran-data.xml
+"""
+import json
+import logging
+import os
+from array import array
+from bisect import bisect_right
+
+from snapshot import current, register
+from surahs import TOTAL_VERSES, verse_count, verse_index, verse_ref
+
+logger = logging.getLogger(__name__)
+
+JUZ, HIZB, PAGE = 'juz', 'hizb', 'page'
+
+# Number of parts of each division in the Madani mushaf
+PART_COUNTS = {JUZ: 30, HIZB: 60, PAGE: 604}
+
+# First verse of each juz
+JUZ_STARTS = (
+    (1, 1), (2, 142), (2, 253), (3, 93), (4, 24), (4, 148), (5, 82), (6, 111), (7, 88), (8, 41),
+    (9, 93), (11, 6), (12, 53), (15, 1), (17, 1), (18, 75), (21, 1), (23, 1), (25, 21), (27, 56),
+    (29, 46), (33, 31), (36, 28), (39, 32), (41, 47), (46, 1), (51, 31), (58, 1), (67, 1), (78, 1),
+)
+
+class Division:
+    """Start verses of the consecutive parts of one division"""
+
+    __slots__ = ('name', 'starts')
+
+    def __init__(self, name, starts):
+        self.name = name
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_refs(cls, name, refs):
+        """
+        Build a division from the first verse of every part
+
+        Args:
+            name (str): JUZ, HIZB or PAGE
+            refs (list): (surah, ayah) pairs or "surah:ayah" strings, part 1 first
+
+        Returns:
+            Division: Validated division
+
+        Raises:
+            ValueError: If the count is wrong, a verse does not exist or the
+                parts are not in order starting at 1:1
+        """
+        if len(refs) != PART_COUNTS[name]:
+            raise ValueError(f"{name} needs {PART_COUNTS[name]} start verses, got {len(refs)}")
+
+        starts = array('H')
+        for ref in refs:
+            surah, ayah = map(int, ref.split(':')) if isinstance(ref, str) else ref
+            index = verse_index(surah, ayah)
+            if index is None:
+                raise ValueError(f"{name} starts at missing verse {surah}:{ayah}")
+            if starts and index <= starts[-1]:
+                raise ValueError(f"{name} starts are out of order at {surah}:{ayah}")
+            starts.append(index)
+        if starts[0] != 0:
+            raise ValueError(f"{name} must start at 1:1")
+        return cls(name, starts)
+
+    def verse_range(self, number):
+        """
+        Get the verses of one part
+
+        Args:
+            number (int): Part number, 1-based
+
+        Returns:
+            range: Global verse indexes, or None for an invalid number
+        """
+        if not 1 <= number <= len(self.starts):
+            return None
+        end = self.starts[number] if number < len(self.starts) else TOTAL_VERSES
+        return range(self.starts[number - 1], end)
+
+    def part_of(self, index):
+        """Return the number of the part containing a global verse index"""
+        return bisect_right(self.starts, index)
+
+    def references(self, number):
+        """
+        Get one part as verse references
+
+        Args:
+            number (int): Part number, 1-based
+
+        Returns:
+            list: (surah, first_ayah, last_ayah) tuples as accepted by
+                Corpus.get_verses, or None for an invalid number
+        """
+        verses = self.verse_range(number)
+        if verses is None:
+            return None
+        references = []
+        index = verses.start
+        while index < verses.stop:
+            surah, first = verse_ref(index)
+            # Stay inside the surah: its last verse or the end of the part
+            last = min(verse_index(surah, verse_count(surah)), verses.stop - 1)
+            references.append((surah, first, first + last - index))
+            index = last + 1
+        return references
+
+def load_divisions(data_dir):
+    """
+    Load every division available for a data directory
+
+    Args:
+        data_dir (str): Corpus data directory
+
+    Returns:
+        dict: Division name -> Division; juz is always present
+    """
+    divisions = {JUZ: Division.from_refs(JUZ, JUZ_STARTS)}
+    path = os.path.join(data_dir, 'divisions.json')
+    if not os.path.exists(path):
+        return divisions
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read {path}: {e}")
+        return divisions
+
+    for name in PART_COUNTS:
+        if name not in raw:
+            continue
+        try:
+            divisions[name] = Division.from_refs(name, raw[name])
+        except (TypeError, ValueError) as e:
+            logger.error(f"Ignoring {name} table in {path}: {e}")
+    return divisions
+
+register('divisions', lambda snapshot, key: load_divisions(snapshot.corpus.data_dir))
+
+def get_division(name):
+    """
+    Return one division of the current corpus
+
+    Args:
+        name (str): JUZ, HIZB or PAGE
+
+    Returns:
+        Division: Division, or None if its table is not installed
+    """
+    return current().get('divisions').get(name)
@@ -0,0 +1,61 @@
+"""
+One background thread that saves the state files of every tracker.
+
+UpdateTracker and PopularityTracker keep their state in memory and write it
+out periodically. With several bots in one process each bot has its own
+UpdateTracker, so instead of a thread per instance they all register their
+flush() here and share one thread. Everything registered is flushed once
+more when the process exits.
+"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# [next run (time.monotonic()), interval, flush]
+_jobs = []
+_lock = threading.Lock()
+_thread = None
+
+def register(flush, interval):
+    """
+    Call flush every interval seconds on the shared thread and at exit
+
+    Args:
+        flush (callable): Called without arguments; must be thread-safe
+        interval (float): Seconds between calls
+    """
+    global _thread
+    with _lock:
+        _jobs.append([time.monotonic() + interval, interval, flush])
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='flusher', daemon=True)
+            _thread.start()
+            atexit.register(flush_all)
+
+def flush_all():
+    """Call every registered flush now"""
+    with _lock:
+        flushes = [job[2] for job in _jobs]
+    for flush in flushes:
+        _call(flush)
+
+def _call(flush):
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"Periodic flush failed: {e}")
+
+def _run():
+    while True:
+        with _lock:
+            now = time.monotonic()
+            due = [job for job in _jobs if job[0] <= now]
+            for job in due:
+                job[0] = now + job[1]
+            wait = min(job[0] for job in _jobs) - now
+        for job in due:
+            _call(job[2])
+        time.sleep(max(wait, 0.01))
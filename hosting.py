@@ -0,0 +1,86 @@
+"""
+Several Telegram bots served by one process.
+
+Every bot gets its own TeleBot, handler set, locale, update offset and
+Telegram file_id cache, since file_ids and update ids are only valid for the
+bot that produced them. Everything else (corpus snapshot, search indexes,
+remote response caches, HTTP pool, worker threads) is shared, so an extra
+bot costs little memory and gets hits from caches the others filled.
+
+The handlers in telebot_main.py are written against one module-level `bot`.
+That name is a BotProxy, which forwards to the bot whose update is being
+handled: the active HostedBot is kept in a context variable that is set when
+a handler task is queued and travels with it to the worker thread.
+"""
+import contextvars
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Handler lists copied from the template bot; message handlers are filtered by command
+HANDLER_LISTS = ('message_handlers', 'edited_message_handlers', 'inline_handlers', 'callback_query_handlers')
+
+_active = contextvars.ContextVar('active_bot', default=None)
+_default = None
+
+class HostedBot:
+    """One bot of the process with its per-bot state"""
+
+    def __init__(self, name, bot, locale, language, commands=None):
+        self.name = name
+        self.bot = bot
+        self.locale = locale
+        # Translation shown to users who did not pick one with /lang
+        self.language = language
+        self.commands = commands
+        self.update_tracker = None
+        self.audio_cache = None
+
+    def __repr__(self):
+        return f"HostedBot({self.name!r}, locale={self.locale!r})"
+
+def active():
+    """Return the bot handling the current update, or the default bot"""
+    return _active.get() or _default
+
+def set_default(hosted):
+    """Make hosted the bot used outside of any update, e.g. at import time"""
+    global _default
+    _default = hosted
+
+@contextmanager
+def activate(hosted):
+    """Make hosted the active bot inside the block and in work queued from it"""
+    token = _active.set(hosted)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+class BotProxy:
+    """Stands in for a TeleBot and forwards to the active bot"""
+
+    def __getattr__(self, name):
+        return getattr(active().bot, name)
+
+def allows(handler, commands):
+    """Check whether a handler belongs to a bot limited to the given commands"""
+    if commands is None:
+        return True
+    handler_commands = handler['filters'].get('commands')
+    # Handlers without a command filter (free text, inline) are always kept
+    return handler_commands is None or any(command in commands for command in handler_commands)
+
+def copy_handlers(template, bot, commands=None):
+    """
+    Register the handlers of the template bot on another bot
+
+    Args:
+        template (telebot.TeleBot): Bot the handlers were declared on
+        bot (telebot.TeleBot): Bot that gets the same handlers
+        commands (list): Commands to keep, or None for all
+    """
+    for name in HANDLER_LISTS:
+        target = getattr(bot, name)
+        target.extend(handler for handler in getattr(template, name) if allows(handler, commands))
@@ -0,0 +1,119 @@
+"""
+Shared keep-alive HTTP session for the telebot Telegram client.
+
+By default telebot lets every handler thread open its own requests.Session,
+so replies from different threads cannot reuse each other's connections and
+pay a fresh TLS handshake. install() builds one session with a bounded
+connection pool and hands it to telebot.apihelper, which then uses it from
+every thread. Connections stay open between requests and TCP keep-alive
+probes drop dead ones before a reply is sent into them.
+
+Pool use is exposed through metrics: requests in flight and the share of
+the pool in use.
+"""
+import logging
+import os
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Connections kept per host; handler threads beyond this wait for a free one
+TELEGRAM_POOL_SIZE = int(os.environ.get('TELEGRAM_POOL_SIZE', '16'))
+TELEGRAM_CONNECT_TIMEOUT = float(os.environ.get('TELEGRAM_CONNECT_TIMEOUT', '5'))
+TELEGRAM_READ_TIMEOUT = float(os.environ.get('TELEGRAM_READ_TIMEOUT', '30'))
+
+# Seconds of idleness before TCP keep-alive probes start, 0 disables them
+TELEGRAM_KEEPALIVE = int(os.environ.get('TELEGRAM_KEEPALIVE', '60'))
+
+# Retries of requests that failed to connect; sent requests are never repeated
+TELEGRAM_CONNECT_RETRIES = int(os.environ.get('TELEGRAM_CONNECT_RETRIES', '2'))
+
+def _keepalive_options(idle):
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # The tuning constants only exist on some platforms
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle // 4)))
+    return options
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with TCP keep-alive that counts the requests it is sending"""
+
+    def __init__(self, pool_size=TELEGRAM_POOL_SIZE, keepalive=TELEGRAM_KEEPALIVE, retries=TELEGRAM_CONNECT_RETRIES):
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        # Only failed connects are retried: a request that reached Telegram may have been acted on
+        max_retries = Retry(total=retries, connect=retries, read=0, status=0)
+        # pool_block makes extra threads wait instead of opening throwaway connections
+        super().__init__(pool_connections=1, pool_maxsize=pool_size, max_retries=max_retries, pool_block=True)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + _keepalive_options(self.keepalive)
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        with self._in_flight_lock:
+            self.in_flight += 1
+        metrics.incr('telegram.http.requests')
+        try:
+            return super().send(request, **kwargs)
+        except requests.RequestException:
+            metrics.incr('telegram.http.errors')
+            raise
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+    def utilization(self):
+        """Share of the pool busy with a request, between 0 and 1"""
+        return round(min(self.in_flight, self.pool_size) / self.pool_size, 2)
+
+_session = None
+_adapter = None
+_install_lock = threading.Lock()
+
+def install():
+    """
+    Make telebot send every API request through one shared pooled session
+
+    Safe to call more than once; later calls return the installed session.
+
+    Returns:
+        requests.Session: The shared session
+    """
+    global _session, _adapter
+    from telebot import apihelper
+
+    with _install_lock:
+        if _session is not None:
+            return _session
+
+        _adapter = PooledAdapter()
+        _session = requests.Session()
+        _session.mount('https://', _adapter)
+        _session.mount('http://', _adapter)
+
+        # A shared session only works when telebot keeps sessions for good
+        apihelper.SESSION_TIME_TO_LIVE = None
+        apihelper.session = _session
+        apihelper.CONNECT_TIMEOUT = TELEGRAM_CONNECT_TIMEOUT
+        apihelper.READ_TIMEOUT = TELEGRAM_READ_TIMEOUT
+
+        metrics.register_gauge('telegram.http.in_flight', lambda: _adapter.in_flight)
+        metrics.register_gauge('telegram.http.pool_size', lambda: _adapter.pool_size)
+        metrics.register_gauge('telegram.http.pool_utilization', _adapter.utilization)
+
+        logger.info(f"Telegram HTTP pool: {TELEGRAM_POOL_SIZE} connections, keep-alive {TELEGRAM_KEEPALIVE}s")
+        return _session
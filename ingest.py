@@ -0,0 +1,353 @@
+"""
+Ingest Qur'on text and translation dumps into the local corpus.
+
+Usage:
+    python ingest.py LANG PATH [--format csv|tsv|txt|xml|jsonl|json] [--sha256 HEX] [--force]
+    python ingest.py --divisions quran-data.xml
+
+Supported inputs (all in canonical verse order):
+    csv/tsv/txt   surah, ayah, text columns (txt is the tanzil "1|1|text" format)
+    xml           tanzil XML: <sura index="1"><aya index="1" text="..."/></sura>
+    jsonl         one {"surah": 1, "ayah": 1, "text": "..."} object per line
+    json          a top-level array of such objects
+
+Records are streamed straight into data/text/<LANG>.txt, so memory use does
+not depend on the dump size. Every record is checked against the surah table
+while streaming. The finished column is swapped in atomically, its checksum
+is recorded in data/manifest.json, and only the indexes derived from that
+language (concordance, similarity matrix) plus the shared vocabulary filter
+are rebuilt. A dump whose checksum matches the manifest is skipped.
+
+--divisions reads the juz, hizb and page starts from the tanzil metadata
+file (quran-data.xml) and writes them to data/divisions.json for divisions.py.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import xml.etree.ElementTree as ElementTree
+
+from surahs import SURAH_COUNT, TOTAL_VERSES, verse_count
+
+logger = logging.getLogger(__name__)
+
+SURAH_KEYS = ('surah', 'sura', 'chapter', 'surah_number')
+AYAH_KEYS = ('ayah', 'aya', 'verse', 'verse_number', 'ayah_number')
+TEXT_KEYS = ('text', 'translation', 'text_translation', 'text_arabic')
+
+_CHUNK_SIZE = 64 * 1024
+
+# No verse record comes close to this; a longer one means the JSON is malformed
+_MAX_RECORD_SIZE = 1024 * 1024
+
+class IngestError(ValueError):
+    """Raised when a dump does not match the surah table"""
+
+def file_sha256(path):
+    """Compute the SHA-256 of a file without reading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _pick(record, keys):
+    for key in keys:
+        if key in record:
+            return record[key]
+    raise IngestError(f"Record has none of the fields {', '.join(keys)}: {record}")
+
+def _from_dict(record):
+    return int(_pick(record, SURAH_KEYS)), int(_pick(record, AYAH_KEYS)), str(_pick(record, TEXT_KEYS))
+
+def iter_delimited(path, delimiter):
+    """Yield (surah, ayah, text) from a delimited text file"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.reader(f, delimiter=delimiter):
+            if not row or row[0].startswith('#') or not row[0].strip().isdigit():
+                # Comments, blank lines and header rows
+                continue
+            if len(row) < 3:
+                raise IngestError(f"Expected surah, ayah and text columns: {row}")
+            yield int(row[0]), int(row[1]), delimiter.join(row[2:])
+
+def iter_xml(path):
+    """Yield (surah, ayah, text) from a tanzil XML file"""
+    surah = None
+    for event, element in ElementTree.iterparse(path, events=('start', 'end')):
+        if event == 'start' and element.tag == 'sura':
+            surah = int(element.get('index'))
+        elif event == 'end' and element.tag == 'aya':
+            yield surah, int(element.get('index')), element.get('text', element.text or '')
+            # Drop parsed verses so memory stays flat
+            element.clear()
+        elif event == 'end' and element.tag == 'sura':
+            element.clear()
+
+def iter_jsonl(path):
+    """Yield (surah, ayah, text) from a JSON Lines file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield _from_dict(json.loads(line))
+
+def iter_json_array(path):
+    """
+    Yield (surah, ayah, text) from a top-level JSON array, one object at a time
+
+    The buffer never holds more than one record plus a chunk, so a record
+    that does not parse within _MAX_RECORD_SIZE characters is reported with
+    its number and character offset instead of buffering the rest of the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(_CHUNK_SIZE)
+        stripped = buffer.lstrip()
+        if not stripped.startswith('['):
+            raise IngestError("Expected a top-level JSON array")
+        # Character offset of the start of buffer in the file
+        offset = len(buffer) - len(stripped) + 1
+        buffer = stripped[1:]
+        number = 1
+        while True:
+            stripped = buffer.lstrip().lstrip(',').lstrip()
+            offset += len(buffer) - len(stripped)
+            buffer = stripped
+            if buffer.startswith(']'):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                if len(buffer) > _MAX_RECORD_SIZE:
+                    raise IngestError(f"Malformed JSON record {number} at character {offset}: {e.msg}")
+                chunk = f.read(_CHUNK_SIZE)
+                if not chunk:
+                    raise IngestError(f"Unexpected end of JSON array in record {number} at character {offset}")
+                buffer += chunk
+                continue
+            yield _from_dict(record)
+            buffer = buffer[end:]
+            offset += end
+            number += 1
+
+READERS = {
+    'csv': lambda path: iter_delimited(path, ','),
+    'tsv': lambda path: iter_delimited(path, '\t'),
+    'txt': lambda path: iter_delimited(path, '|'),
+    'xml': iter_xml,
+    'jsonl': iter_jsonl,
+    'json': iter_json_array,
+}
+
+def write_column(records, path):
+    """
+    Stream records into a column file, checking them against the surah table
+
+    Args:
+        records (iterable): (surah, ayah, text) tuples in canonical order
+        path (str): Column file to write
+
+    Returns:
+        int: Number of verses written
+
+    Raises:
+        IngestError: If a verse is missing, duplicated, out of order or extra
+    """
+    surah, ayah = 1, 1
+    written = 0
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as out:
+            for record_surah, record_ayah, text in records:
+                if surah > SURAH_COUNT or (record_surah, record_ayah) != (surah, ayah):
+                    raise IngestError(f"Expected verse {surah}:{ayah}, got {record_surah}:{record_ayah}")
+                out.write(' '.join(text.split()))
+                out.write('\n')
+                written += 1
+                ayah += 1
+                if ayah > verse_count(surah):
+                    surah, ayah = surah + 1, 1
+        if written != TOTAL_VERSES:
+            raise IngestError(f"Dump ends at verse {surah}:{ayah} after {written} of {TOTAL_VERSES} verses")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+def load_manifest(data_dir):
+    """Read data/manifest.json, which records the checksums of every column"""
+    path = os.path.join(data_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(data_dir, manifest):
+    """Write data/manifest.json atomically"""
+    path = os.path.join(data_dir, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def rebuild_indexes(data_dir, language):
+    """
+    Rebuild the saved indexes derived from one language column
+
+    Args:
+        data_dir (str): Corpus data directory
+        language (str): Language whose column changed
+    """
+    from bloom import build_vocabulary_filter
+    from concordance import build_concordance, save_concordance
+    from corpus import Corpus
+    from search_index import SearchEngine
+
+    corpus = Corpus(data_dir)
+    index = SearchEngine(corpus).index(language)
+
+    save_concordance(build_concordance(index), os.path.join(data_dir, 'concordance', f"{language}.json"))
+
+    try:
+        import numpy as np
+        from similar import build_matrix
+    except ImportError:
+        logger.warning("numpy is not installed, skipping the similarity matrix")
+    else:
+        similar_dir = os.path.join(data_dir, 'similar')
+        os.makedirs(similar_dir, exist_ok=True)
+        # Running bots memory-map the old matrix, so never overwrite it in place
+        path = os.path.join(similar_dir, f"{language}.npy")
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, build_matrix(index))
+        os.replace(path + '.tmp', path)
+
+    # The vocabulary filter covers all languages, so it is rebuilt as a whole
+    bloom = build_vocabulary_filter(corpus)
+    if bloom is not None:
+        bloom.save(os.path.join(data_dir, 'vocabulary.bloom'))
+
+def ingest(language, path, data_format=None, expected_sha256=None, data_dir=None, force=False):
+    """
+    Ingest one dump into the corpus
+
+    Args:
+        language (str): Language code ("ar" for the Arabic text)
+        path (str): Dump file
+        data_format (str): One of READERS, guessed from the extension if None
+        expected_sha256 (str): Reject the dump if its checksum differs
+        data_dir (str): Corpus data directory
+        force (bool): Ingest even if the manifest says the dump is unchanged
+
+    Returns:
+        bool: True if the column was rewritten, False if it was unchanged
+    """
+    from corpus import DATA_DIR
+
+    data_dir = data_dir or DATA_DIR
+    data_format = data_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if data_format not in READERS:
+        raise IngestError(f"Unknown format {data_format!r}, use one of {', '.join(READERS)}")
+
+    checksum = file_sha256(path)
+    if expected_sha256 and checksum != expected_sha256.lower():
+        raise IngestError(f"Checksum mismatch for {path}: {checksum}")
+
+    manifest = load_manifest(data_dir)
+    entry = manifest.get(language, {})
+    column_path = os.path.join(data_dir, 'text', f"{language}.txt")
+    if not force and entry.get('source_sha256') == checksum and os.path.exists(column_path):
+        logger.info(f"{language}: {path} is unchanged, nothing to do")
+        return False
+
+    os.makedirs(os.path.dirname(column_path), exist_ok=True)
+    verses = write_column(READERS[data_format](path), column_path)
+
+    manifest[language] = {
+        'source': os.path.basename(path),
+        'source_sha256': checksum,
+        'column_sha256': file_sha256(column_path),
+        'verses': verses,
+    }
+    save_manifest(data_dir, manifest)
+    logger.info(f"{language}: wrote {verses} verses to {column_path}")
+
+    rebuild_indexes(data_dir, language)
+    logger.info(f"{language}: indexes rebuilt")
+    return True
+
+def ingest_divisions(path, data_dir=None):
+    """
+    Write data/divisions.json from the tanzil metadata file
+
+    Args:
+        path (str): quran-data.xml with <juz>, <quarter> and <page> elements
+            carrying sura and aya attributes
+        data_dir (str): Corpus data directory
+
+    Returns:
+        dict: Division name -> number of parts written
+
+    Raises:
+        IngestError: If a division does not match the mushaf layout
+    """
+    from corpus import DATA_DIR
+    from divisions import HIZB, JUZ, PAGE, Division
+
+    data_dir = data_dir or DATA_DIR
+    starts = {'juz': [], 'quarter': [], 'page': []}
+    for _event, element in ElementTree.iterparse(path):
+        if element.tag in starts:
+            starts[element.tag].append((int(element.get('index')), f"{element.get('sura')}:{element.get('aya')}"))
+            element.clear()
+
+    # A hizb is four quarters (rub')
+    tables = {
+        JUZ: [ref for _index, ref in sorted(starts['juz'])],
+        HIZB: [ref for _index, ref in sorted(starts['quarter'])][::4],
+        PAGE: [ref for _index, ref in sorted(starts['page'])],
+    }
+    for name, refs in tables.items():
+        try:
+            Division.from_refs(name, refs)
+        except ValueError as e:
+            raise IngestError(f"{path}: {e}") from e
+
+    out_path = os.path.join(data_dir, 'divisions.json')
+    os.makedirs(data_dir, exist_ok=True)
+    with open(out_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(tables, f)
+    os.replace(out_path + '.tmp', out_path)
+    logger.info(f"Wrote {out_path}")
+    return {name: len(refs) for name, refs in tables.items()}
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+
+    parser = argparse.ArgumentParser(description="Ingest a Qur'on text or translation dump")
+    parser.add_argument('language', nargs='?', help="language code, 'ar' for the Arabic text")
+    parser.add_argument('path', nargs='?', help="dump file")
+    parser.add_argument('--divisions', metavar='PATH', help="import juz, hizb and page starts from quran-data.xml")
+    parser.add_argument('--format', dest='data_format', choices=sorted(READERS))
+    parser.add_argument('--sha256', dest='expected_sha256', help="expected checksum of the dump")
+    parser.add_argument('--data-dir', dest='data_dir')
+    parser.add_argument('--force', action='store_true', help="ingest even if the dump is unchanged")
+    args = parser.parse_args()
+    if not args.divisions and not args.path:
+        parser.error("LANG and PATH are required unless --divisions is given")
+
+    try:
+        if args.divisions:
+            ingest_divisions(args.divisions, args.data_dir)
+        if args.path:
+            ingest(args.language, args.path, args.data_format, args.expected_sha256, args.data_dir, args.force)
+    except (IngestError, OSError) as e:
+        logger.error(f"Ingestion failed: {e}")
+        exit(1)
@@ -0,0 +1,166 @@
+"""
+Interface texts per bot locale.
+
+Every reply of the telebot handlers comes from this table, including the
+/stats, /memory and /botstats reports, whose formatters take the locale.
+The exceptions are the verse, surah and search result layouts of utils.py,
+which are shared with the other entry points and stay in English, and
+search syntax errors, which come from the query parser in Uzbek. A missing
+locale or key falls back to Uzbek.
+"""
+
+DEFAULT_LOCALE = 'uz'
+
+_TEXTS = {
+    'uz': {
+        'greeting': (
+            "Assalomu alaykum, {name}! 🌙\n\n"
+            "Qurʼon botiga xush kelibsiz. Bu bot sizga Qurʼon oyatlarini o'qish, qidirish va ulashish imkonini beradi.\n\n"
+            "Buyruqlar:\n"
+        ),
+        'help': "Qurʼon botidan foydalanish uchun quyidagi buyruqlardan foydalaning:\n\n",
+        'commands': (
+            "/start - Botni qayta ishga tushirish\n"
+            "/help - Yordam olish\n"
+            "/verse [sura]:[oyat] - Oyatlarni olish (masalan, /verse 1:1, /verse 2:255-257)\n"
+            "/surah [sura] - Suradan oyatlarni olish (masalan, /surah 1)\n"
+            "/juz [raqam] - Juzni o'qish (masalan, /juz 30 yoki /juz 2:255)\n"
+            "/page [raqam] - Mushaf sahifasini o'qish (masalan, /page 1)\n"
+            "/search [so'z] - Kalit so'z bo'yicha qidirish (masalan, /search rahmat)\n"
+            "   Ibora: \"kechiruvchi mehribon\", mantiq: rahmat OR nur, rahmat -azob, jannat NEAR/5 daryo\n"
+            "/audio [sura]:[oyat] - Oyat tilovatini tinglash (masalan, /audio 1:1)\n"
+            "/similar [sura]:[oyat] - O'xshash oyatlarni topish (masalan, /similar 2:255)\n"
+            "/stats [so'z] - So'z necha marta va qaysi suralarda uchrashi (masalan, /stats rahmat)\n"
+            "/lang [til] - Tarjima tilini tanlash (masalan, /lang ru)"
+        ),
+        'busy': "⏳ Bot hozir band. Iltimos, birozdan so'ng qayta urinib ko'ring.",
+        'throttled': "Juda ko'p so'rov yuborildi. Iltimos, biroz kuting.",
+        'error': "Xato: {message}",
+        'unknown_error': "Nomalum xato",
+        'no_corpus': "Mahalliy korpus mavjud emas, bu buyruq hozircha ishlamaydi.",
+        'searching': "🔍 *{query}* so'zi bo'yicha qidirilmoqda...",
+        'no_results': "*{query}* so'zi bo'yicha hech qanday natija topilmadi.",
+        'did_you_mean': "\n\nBalki siz qidirgansiz: ",
+        'search_usage': "Iltimos, qidiruv so'zini kiriting. Masalan: /search rahmat",
+        'verse_usage': "Iltimos, surah va oyat raqamini kiriting. Masalan: /{command} {example}",
+        'verse_format': "Noto'g'ri format. Iltimos, surah:oyat shaklida kiriting (masalan, {example})",
+        'remote_limit': "Hozircha bir so'rovda ko'pi bilan {limit} ta oyat olish mumkin (masalan, /verse 2:255-257)",
+        'surah_usage': "Iltimos, surah raqamini kiriting. Masalan: /surah 1",
+        'surah_not_found': "Surah topilmadi. Raqamni (1 dan 114 gacha) yoki nomini kiriting (masalan, /surah 1)",
+        'surah_header': "🔍 *Surah {number}: {name}* ({name_arabic}), {verses} oyat. Dastlabki oyatlar...",
+        'juz': "Juz",
+        'page': "Sahifa",
+        'division_header': "📖 *{label} {number}*: {first} – {last}, {verses} oyat",
+        'division_pages': " (sahifa {first}–{last})",
+        'division_juz': " ({juz}-juz)",
+        'division_usage': "Iltimos, raqamni kiriting. Masalan: /{command} 1 yoki /{command} 2:255",
+        'division_missing': "{label} jadvali hali o'rnatilmagan.",
+        'division_number': "Noto'g'ri raqam. 1 dan {count} gacha raqam yoki surah:oyat kiriting.",
+        'division_parts': "Bu {label} {count} qismdan iborat.",
+        'division_part': "\n{part}/{count}-qism",
+        'division_more': "Davomi: /{command} {number} {part}",
+        'similar_unavailable': "O'xshash oyatlarni qidirish hozircha mavjud emas.",
+        'similar_header': "*{verse}* ga o'xshash oyatlar\n\n",
+        'stats_usage': "Iltimos, so'zni kiriting. Masalan: /stats rahmat",
+        'stats_one_word': "Iltimos, bitta so'z kiriting. Masalan: /stats rahmat",
+        'stats_total': "*Jami:* {count} marta\n",
+        'stats_verses': "*Oyatlar:* {count}\n",
+        'stats_surahs': "*Suralar:* {count}\n\n",
+        'stats_more': "\n_...va yana {count} ta sura_",
+        'memory_empty': "Xotirada hali hech narsa yuklanmagan.",
+        'memory_header': "Korpus v{version} xotirasi:",
+        'memory_total': "Jami: {heap}, mmap: {mapped}",
+        'metrics_empty': "Statistika hali yo'q.",
+        'lang_current': "Joriy til: {language}\nMavjud tillar: {languages}\nMasalan: /lang uz",
+        'lang_missing': "Bunday tarjima mavjud emas. Mavjud tillar: {languages}",
+        'lang_changed': "Tarjima tili o'zgartirildi: {language}",
+        'audio_missing': "{verse} oyati uchun audio topilmadi.",
+        'inline_frequency': "{count} marta uchraydi",
+        'reload_started': "Korpus qayta yuklanmoqda (joriy versiya v{version})...",
+        'reload_failed': "Qayta yuklash bekor qilindi, eski versiya ishlayapti: {error}",
+        'reload_done': "Korpus v{version} ishga tushirildi.",
+    },
+    'ru': {
+        'greeting': (
+            "Ассаляму алейкум, {name}! 🌙\n\n"
+            "Добро пожаловать в бот Корана. Здесь можно читать, искать и отправлять аяты Корана.\n\n"
+            "Команды:\n"
+        ),
+        'help': "Чтобы пользоваться ботом, используйте следующие команды:\n\n",
+        'commands': (
+            "/start - Перезапустить бота\n"
+            "/help - Помощь\n"
+            "/verse [сура]:[аят] - Получить аяты (например, /verse 1:1, /verse 2:255-257)\n"
+            "/surah [сура] - Аяты суры (например, /surah 1)\n"
+            "/juz [номер] - Читать джуз (например, /juz 30 или /juz 2:255)\n"
+            "/page [номер] - Читать страницу мусхафа (например, /page 1)\n"
+            "/search [слово] - Поиск по слову (например, /search милость)\n"
+            "   Фраза: \"прощающий милосердный\", логика: милость OR свет, милость -наказание\n"
+            "/audio [сура]:[аят] - Слушать чтение аята (например, /audio 1:1)\n"
+            "/similar [сура]:[аят] - Похожие аяты (например, /similar 2:255)\n"
+            "/stats [слово] - Сколько раз и в каких сурах встречается слово (например, /stats милость)\n"
+            "/lang [язык] - Выбрать язык перевода (например, /lang uz)"
+        ),
+        'busy': "⏳ Бот сейчас занят. Пожалуйста, попробуйте чуть позже.",
+        'throttled': "Слишком много запросов. Пожалуйста, немного подождите.",
+        'error': "Ошибка: {message}",
+        'unknown_error': "Неизвестная ошибка",
+        'no_corpus': "Локальный корпус не установлен, эта команда пока не работает.",
+        'searching': "🔍 Ищу *{query}*...",
+        'no_results': "По запросу *{query}* ничего не найдено.",
+        'did_you_mean': "\n\nВозможно, вы искали: ",
+        'search_usage': "Пожалуйста, введите слово для поиска. Например: /search милость",
+        'verse_usage': "Пожалуйста, укажите номер суры и аята. Например: /{command} {example}",
+        'verse_format': "Неверный формат. Укажите сура:аят (например, {example})",
+        'remote_limit': "Сейчас за один запрос можно получить не больше {limit} аятов (например, /verse 2:255-257)",
+        'surah_usage': "Пожалуйста, укажите номер суры. Например: /surah 1",
+        'surah_not_found': "Сура не найдена. Укажите номер (от 1 до 114) или название (например, /surah 1)",
+        'surah_header': "🔍 *Сура {number}: {name}* ({name_arabic}), аятов: {verses}. Первые аяты...",
+        'juz': "Джуз",
+        'page': "Страница",
+        'division_header': "📖 *{label} {number}*: {first} – {last}, аятов: {verses}",
+        'division_pages': " (страницы {first}–{last})",
+        'division_juz': " (джуз {juz})",
+        'division_usage': "Пожалуйста, укажите номер. Например: /{command} 1 или /{command} 2:255",
+        'division_missing': "Таблица «{label}» ещё не установлена.",
+        'division_number': "Неверный номер. Укажите число от 1 до {count} или сура:аят.",
+        'division_parts': "Раздел «{label}» состоит из {count} частей.",
+        'division_part': "\nЧасть {part}/{count}",
+        'division_more': "Продолжение: /{command} {number} {part}",
+        'similar_unavailable': "Поиск похожих аятов пока недоступен.",
+        'similar_header': "Аяты, похожие на *{verse}*\n\n",
+        'stats_usage': "Пожалуйста, введите слово. Например: /stats милость",
+        'stats_one_word': "Пожалуйста, введите одно слово. Например: /stats милость",
+        'stats_total': "*Всего:* {count} раз\n",
+        'stats_verses': "*Аятов:* {count}\n",
+        'stats_surahs': "*Сур:* {count}\n\n",
+        'stats_more': "\n_...и ещё сур: {count}_",
+        'memory_empty': "В памяти пока ничего не загружено.",
+        'memory_header': "Память корпуса v{version}:",
+        'memory_total': "Всего: {heap}, mmap: {mapped}",
+        'metrics_empty': "Статистики пока нет.",
+        'lang_current': "Текущий язык: {language}\nДоступные языки: {languages}\nНапример: /lang ru",
+        'lang_missing': "Такого перевода нет. Доступные языки: {languages}",
+        'lang_changed': "Язык перевода изменён: {language}",
+        'audio_missing': "Аудио для аята {verse} не найдено.",
+        'inline_frequency': "встречается {count} раз",
+        'reload_started': "Корпус перезагружается (текущая версия v{version})...",
+        'reload_failed': "Перезагрузка отменена, работает старая версия: {error}",
+        'reload_done': "Корпус v{version} запущен.",
+    },
+}
+
+def text(key, locale=DEFAULT_LOCALE, **values):
+    """
+    Get an interface text
+
+    Args:
+        key (str): Text name, e.g. "greeting"
+        locale (str): Locale of the bot
+        **values: Values for the placeholders in the text
+
+    Returns:
+        str: Text in the locale, or in Uzbek if it has no translation
+    """
+    template = _TEXTS.get(locale, {}).get(key) or _TEXTS[DEFAULT_LOCALE][key]
+    return template.format(**values) if values else template
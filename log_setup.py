@@ -0,0 +1,174 @@
+"""
+Non-blocking structured logging for the bot entry points.
+
+setup_logging() puts a QueueHandler on the root logger, so a log call on the
+request path only appends the record to a bounded in-memory queue. A
+QueueListener thread formats the records as one JSON object per line and
+writes them to stderr. When the queue is full the record is dropped and
+counted instead of blocking the handler.
+
+Records logged inside log_context() carry the update_id, the chat and the
+milliseconds since the update was received. INFO and DEBUG records are kept
+with probability LOG_SAMPLE_RATE; warnings and errors are always kept.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
+# Share of INFO and DEBUG records that are written, between 0 and 1
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+
+# Libraries that attach their own stderr handler on import; their records go
+# through the root queue handler instead
+LIBRARY_LOGGERS = ('TeleBot',)
+
+# (update_id, chat_id, started_at) of the update being handled
+_context = contextvars.ContextVar('log_context', default=None)
+
+@contextmanager
+def log_context(update_id=None, chat=None, started_at=None):
+    """
+    Attach an update to every record logged inside the block
+
+    Args:
+        update_id (int): Telegram update_id
+        chat (int): Chat id
+        started_at (float): time.monotonic() when the update was received,
+            defaults to now
+    """
+    token = _context.set((update_id, chat, started_at or time.monotonic()))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def bind(func, update_id=None, chat=None, started_at=None):
+    """Wrap func so it runs inside log_context(), e.g. on a worker thread"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with log_context(update_id, chat, started_at):
+            return func(*args, **kwargs)
+    return wrapper
+
+def set_context(update_id=None, chat=None):
+    """Attach an update to the rest of the current asyncio task"""
+    _context.set((update_id, chat, time.monotonic()))
+
+class ContextFilter(logging.Filter):
+    """Samples low-severity records and stamps the rest with the update context"""
+
+    def __init__(self, sample_rate=LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            metrics.incr('logging.sampled_out')
+            return False
+        context = _context.get()
+        if context is not None:
+            update_id, chat, started_at = context
+            record.update_id = update_id
+            record.chat = chat
+            record.latency_ms = round((time.monotonic() - started_at) * 1000, 1)
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def prepare(self, record):
+        # Render the message and traceback here, where the arguments are still valid,
+        # but leave the JSON formatting to the listener thread
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr('logging.dropped')
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    FIELDS = ('update_id', 'chat', 'latency_ms')
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_listener = None
+_setup_lock = threading.Lock()
+
+def setup_logging(level=LOG_LEVEL, stream=None):
+    """
+    Route all logging through the queue and the JSON listener
+
+    Replaces logging.basicConfig in the entry points. Later calls do nothing.
+    Call it after importing telebot, whose logger gets its own stderr
+    handler on import; that handler is removed here.
+
+    Args:
+        level (str): Root log level
+        stream: Output stream, defaults to stderr
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+        # Otherwise their lines are written twice, once synchronously
+        for name in LIBRARY_LOGGERS:
+            library_logger = logging.getLogger(name)
+            for handler in list(library_logger.handlers):
+                library_logger.removeHandler(handler)
+            library_logger.propagate = True
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        metrics.register_gauge('logging.queued', log_queue.qsize)
+        # Write out what is still queued when the process exits
+        atexit.register(_listener.stop)
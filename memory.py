@@ -0,0 +1,128 @@
+"""
+Approximate memory accounting for the /memory admin command.
+
+Sizes are measured by walking object graphs with sys.getsizeof, so shared
+objects are counted once, under the first structure that reaches them: text
+columns before the indexes built on them, indexes before derived structures.
+Memory-mapped arrays (the similarity matrices) are reported separately,
+because the OS pages them in and out and shares them between workers.
+"""
+import sys
+import types
+
+import locales
+from snapshot import current
+
+# name -> callable returning the object to measure, for caches outside the snapshot
+_caches = {}
+
+_ATOMIC = (str, bytes, bytearray, int, float, bool, type(None), range, memoryview)
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def register(name, getter):
+    """
+    Include a cache in the memory report
+
+    Args:
+        name (str): Cache name, e.g. "audio_file_ids"
+        getter (callable): Returns the object holding the cache
+    """
+    _caches[name] = getter
+
+def sizeof(obj, seen=None):
+    """
+    Measure an object and everything it references
+
+    Args:
+        obj: Object to measure
+        seen (set): ids of objects already counted, shared between calls
+
+    Returns:
+        tuple: (heap bytes, memory-mapped bytes)
+    """
+    seen = set() if seen is None else seen
+    heap = mapped = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        seen.add(id(obj))
+
+        nbytes = getattr(obj, 'nbytes', None)
+        if isinstance(nbytes, int) and hasattr(obj, 'dtype'):
+            # numpy array: views and memory maps do not own their buffer
+            if getattr(obj, 'base', None) is None:
+                heap += nbytes
+            else:
+                mapped += nbytes
+            continue
+
+        heap += sys.getsizeof(obj)
+        if isinstance(obj, _ATOMIC):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == 'deque':
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, '__slots__', ()):
+                    value = getattr(obj, slot, None)
+                    if value is not None:
+                        stack.append(value)
+    return heap, mapped
+
+def report():
+    """
+    Measure the current snapshot and every registered cache
+
+    Returns:
+        list: (name, heap bytes, memory-mapped bytes) rows
+    """
+    snapshot = current()
+    seen = set()
+    rows = []
+    store = snapshot.corpus.store
+    for language in store.loaded_languages():
+        rows.append((f"corpus.{language}", *sizeof(store.column(language), seen)))
+    for language in snapshot.engine.languages():
+        rows.append((f"index.{language}", *sizeof(snapshot.engine.index(language), seen)))
+    for (name, key), value in snapshot.derived().items():
+        rows.append((f"{name}.{key}" if key is not None else name, *sizeof(value, seen)))
+    for name, getter in list(_caches.items()):
+        rows.append((f"cache.{name}", *sizeof(getter(), seen)))
+    return rows
+
+def _human(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def format_report(locale=locales.DEFAULT_LOCALE):
+    """
+    Format the memory report for a Telegram message
+
+    Args:
+        locale (str): Locale of the labels
+
+    Returns:
+        str: One line per structure plus the totals
+    """
+    rows = report()
+    if not rows:
+        return locales.text('memory_empty', locale)
+    lines = [locales.text('memory_header', locale, version=current().version)]
+    for name, heap, mapped in rows:
+        line = f"{name}: {_human(heap)}"
+        if mapped:
+            line += f" (+{_human(mapped)} mmap)"
+        lines.append(line)
+    lines.append(locales.text('memory_total', locale, heap=_human(sum(row[1] for row in rows)),
+                              mapped=_human(sum(row[2] for row in rows))))
+    return "\n".join(lines)
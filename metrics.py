@@ -0,0 +1,62 @@
+"""
+Process-wide counters and gauges shown by the /botstats command.
+"""
+import threading
+
+import locales
+
+_counters = {}
+_gauges = {}
+_lock = threading.Lock()
+
+def incr(name, amount=1):
+    """
+    Increase a counter
+
+    Args:
+        name (str): Counter name, e.g. "search.throttled"
+        amount (int): Increment
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def register_gauge(name, callback):
+    """
+    Register a value that is read when stats are requested
+
+    Args:
+        name (str): Gauge name
+        callback (callable): Returns the current value
+    """
+    _gauges[name] = callback
+
+def snapshot():
+    """
+    Get the current value of every counter and gauge
+
+    Returns:
+        dict: Name -> value, sorted by name
+    """
+    with _lock:
+        values = dict(_counters)
+    for name, callback in list(_gauges.items()):
+        try:
+            values[name] = callback()
+        except Exception as e:
+            values[name] = f"error: {e}"
+    return dict(sorted(values.items()))
+
+def format_stats(locale=locales.DEFAULT_LOCALE):
+    """
+    Format all counters and gauges for a Telegram message
+
+    Args:
+        locale (str): Locale of the labels
+
+    Returns:
+        str: One "name: value" line per metric
+    """
+    values = snapshot()
+    if not values:
+        return locales.text('metrics_empty', locale)
+    return "\n".join(f"{name}: {value}" for name, value in values.items())
@@ -0,0 +1,76 @@
+"""
+Run several bots in one process, sharing one corpus, index and cache set.
+
+The main bot uses TELEGRAM_TOKEN as in bot_main.py. Further bots are listed
+in BOTS_FILE (bots.json), each with the environment variable holding its
+token, its interface locale, its default translation and optionally the
+commands it answers:
+
+    [
+        {"name": "ru", "token_env": "TELEGRAM_TOKEN_RU", "locale": "ru", "language": "ru"},
+        {"name": "test", "token_env": "TELEGRAM_TOKEN_TEST", "commands": ["start", "help", "verse"]}
+    ]
+"""
+import json
+import logging
+import os
+import threading
+
+import hosting
+import snapshot
+from telebot_main import create_bot, main_bot, start_warm_up
+
+logger = logging.getLogger(__name__)
+
+BOTS_FILE = os.environ.get('BOTS_FILE', 'bots.json')
+
+def load_bots(path=BOTS_FILE):
+    """
+    Create the extra bots listed in a bots file
+
+    Args:
+        path (str): JSON file with a list of bot entries
+
+    Returns:
+        list: hosting.HostedBot for every entry whose token is set
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    bots = []
+    for entry in entries:
+        token = os.environ.get(entry['token_env'])
+        if not token:
+            logger.error(f"{entry['token_env']} is not set, skipping bot {entry['name']}")
+            continue
+        hosted = create_bot(
+            entry['name'], token,
+            locale=entry.get('locale', main_bot.locale),
+            language=entry.get('language', main_bot.language),
+            commands=entry.get('commands'),
+        )
+        hosting.copy_handlers(main_bot.bot, hosted.bot, hosted.commands)
+        bots.append(hosted)
+    return bots
+
+def poll(hosted):
+    """Poll one bot until the process stops"""
+    logger.info(f"Starting bot {hosted.name} ({hosted.locale})")
+    try:
+        hosted.bot.infinity_polling()
+    except Exception as e:
+        logger.error(f"Error running bot {hosted.name}: {e}")
+
+if __name__ == "__main__":
+    bots = [main_bot] + load_bots()
+    # SIGHUP reloads the corpus of all bots without stopping polling
+    snapshot.install_signal_handler()
+    start_warm_up()
+
+    threads = [threading.Thread(target=poll, args=(hosted,), name=f'poll-{hosted.name}') for hosted in bots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,208 @@
+"""
+Rolling popularity of verses, queries and languages, used to warm caches.
+
+Every served verse key, search query and translation language adds one hit
+to a histogram whose counts decay with a half-life of POPULARITY_HALF_LIFE
+seconds, so the ranking follows current traffic. The histogram is saved to
+POPULARITY_FILE and read back on start, where warm_snapshot() builds the
+indexes and derived structures the top entries will need before the first
+request arrives.
+
+Queries are never stored as typed: only their normalized search terms are
+kept (see query_key), and only for short queries that found something.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import flusher
+import metrics
+from search_index import tokenize
+from snapshot import current
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_FILE = os.environ.get('POPULARITY_FILE', 'popularity.json')
+POPULARITY_HALF_LIFE = float(os.environ.get('POPULARITY_HALF_LIFE', str(7 * 24 * 3600)))
+POPULARITY_FLUSH_INTERVAL = float(os.environ.get('POPULARITY_FLUSH_INTERVAL', '60'))
+
+# Entries kept per kind; the least popular are dropped beyond this
+POPULARITY_MAX_ENTRIES = int(os.environ.get('POPULARITY_MAX_ENTRIES', '5000'))
+
+# Top entries of each kind used for warming
+WARM_VERSES = int(os.environ.get('WARM_VERSES', '200'))
+WARM_QUERIES = int(os.environ.get('WARM_QUERIES', '50'))
+WARM_LANGUAGES = int(os.environ.get('WARM_LANGUAGES', '3'))
+
+# Longer free text is more likely a personal message than a search and is not recorded
+QUERY_MAX_TERMS = 4
+
+VERSE, QUERY, LANGUAGE = 'verse', 'query', 'language'
+
+def query_key(query):
+    """
+    Normalize a search query for the histogram and the remote search cache
+
+    Args:
+        query (str): Query as typed
+
+    Returns:
+        str: Lowercase search terms joined by spaces, or None if the query
+            has no terms or more than QUERY_MAX_TERMS
+    """
+    terms = tokenize(query)
+    if not terms or len(terms) > QUERY_MAX_TERMS:
+        return None
+    return ' '.join(terms)
+
+class PopularityTracker:
+    """Exponentially decaying hit counts per kind, persisted to a JSON file"""
+
+    def __init__(self, path=POPULARITY_FILE, half_life=POPULARITY_HALF_LIFE, max_entries=POPULARITY_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        # Scores are stored relative to self._epoch, so decaying means scaling new hits up
+        self._rate = math.log(2) / half_life
+        self._epoch = time.time()
+        self._scores = {VERSE: {}, QUERY: {}, LANGUAGE: {}}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+        flusher.register(self.flush, POPULARITY_FLUSH_INTERVAL)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read popularity histogram {self.path}: {e}")
+            return
+        # Bring the saved scores to this process's epoch
+        factor = math.exp(-self._rate * (self._epoch - state.get('saved_at', self._epoch)))
+        for kind, scores in state.get('scores', {}).items():
+            if kind in self._scores:
+                self._scores[kind] = {key: score * factor for key, score in scores.items()}
+
+        # Files written before queries were normalized may hold raw text; rewrite them without it
+        queries = self._scores[QUERY]
+        if any(query_key(query) != query for query in queries):
+            self._scores[QUERY] = {query: score for query, score in queries.items() if query_key(query) == query}
+            self._dirty = True
+
+    def record(self, kind, key):
+        """
+        Count one hit
+
+        Args:
+            kind (str): VERSE ("surah:ayah"), QUERY (a query_key) or LANGUAGE
+            key (str): Entry that was served
+        """
+        weight = math.exp(self._rate * (time.time() - self._epoch))
+        with self._lock:
+            scores = self._scores[kind]
+            scores[key] = scores.get(key, 0.0) + weight
+            self._dirty = True
+            if len(scores) > self.max_entries * 2:
+                self._prune(scores)
+
+    def _prune(self, scores):
+        keep = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.max_entries]
+        scores.clear()
+        scores.update(keep)
+
+    def top(self, kind, limit):
+        """
+        Get the most popular entries
+
+        Args:
+            kind (str): VERSE, QUERY or LANGUAGE
+            limit (int): Number of entries
+
+        Returns:
+            list: Keys, most popular first
+        """
+        with self._lock:
+            items = list(self._scores[kind].items())
+        items.sort(key=lambda item: item[1], reverse=True)
+        return [key for key, _score in items[:limit]]
+
+    def flush(self):
+        """Write the histogram to disk if it changed"""
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return
+            # Saved scores are decayed to the save time, so they stay comparable across restarts
+            factor = math.exp(-self._rate * (now - self._epoch))
+            state = {
+                'saved_at': now,
+                'scores': {
+                    kind: {key: score * factor for key, score in scores.items()}
+                    for kind, scores in self._scores.items()
+                },
+            }
+            self._dirty = False
+
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save popularity histogram {self.path}: {e}")
+
+def warm_snapshot(tracker, default_language):
+    """
+    Build what the most popular entries need in the current snapshot
+
+    Loads the columns and search indexes of the top languages, the vocabulary
+    filter, completers and similarity neighbour lists of the top verses.
+    Queries need nothing more once the index is built, so they are not run.
+
+    Args:
+        tracker (PopularityTracker): Histogram to read
+        default_language (str): Language warmed even without history
+
+    Returns:
+        int: Number of entries warmed
+    """
+    from autocomplete import get_autocompleter
+    from bloom import get_vocabulary_filter
+    from similar import get_similarity_index
+    from surahs import verse_index
+
+    snapshot = current()
+    if not snapshot.corpus.is_available():
+        return 0
+    started = time.monotonic()
+
+    languages = tracker.top(LANGUAGE, WARM_LANGUAGES)
+    if default_language not in languages:
+        languages.append(default_language)
+    docs = []
+    for key in tracker.top(VERSE, WARM_VERSES):
+        surah, _, ayah = key.partition(':')
+        if surah.isdigit() and ayah.isdigit():
+            doc = verse_index(int(surah), int(ayah))
+            if doc is not None:
+                docs.append(doc)
+
+    get_vocabulary_filter()
+    warmed = 0
+    for language in languages:
+        if snapshot.engine.index(language) is None:
+            continue
+        get_autocompleter(language)
+        similarity = get_similarity_index(language)
+        if similarity is not None:
+            similarity.precompute(docs)
+        warmed += 1 + len(docs)
+
+    metrics.incr('warmup.entries', warmed)
+    logger.info(f"Warmed {len(languages)} languages and {len(docs)} verses in {time.monotonic() - started:.1f}s")
+    return warmed
@@ -0,0 +1,114 @@
+"""
+Remote response cache and speculative prefetching of the next verses.
+
+When the local corpus is not installed, verses and searches come from the
+remote API. Successful responses are kept in a ResponseCache (LRU), and after
+a reader is served surah:ayah the following PREFETCH_AHEAD verses are fetched
+in the background, so a sequential reader gets each next verse from memory.
+
+Prefetching runs on PREFETCH_WORKERS threads with a small bounded queue, and
+a job starts only while the idle callback reports no live work waiting;
+otherwise it is dropped, because speculative work must never delay a real
+request.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '5000'))
+PREFETCH_AHEAD = int(os.environ.get('PREFETCH_AHEAD', '3'))
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '1'))
+PREFETCH_QUEUE_SIZE = int(os.environ.get('PREFETCH_QUEUE_SIZE', '50'))
+
+class ResponseCache:
+    """Least-recently-used cache of successful remote API responses"""
+
+    def __init__(self, name, fetch, size=RESPONSE_CACHE_SIZE):
+        self.name = name
+        self.size = size
+        self._fetch = fetch
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.register_gauge(f'cache.{name}.size', lambda: len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, *key):
+        """
+        Return the cached response for key, fetching it on a miss
+
+        Args:
+            *key: Arguments of the fetch function, e.g. (surah, ayah)
+
+        Returns:
+            dict: Response; failed responses are returned but not cached
+        """
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+        if response is not None:
+            metrics.incr(f'cache.{self.name}.hit')
+            return response
+
+        metrics.incr(f'cache.{self.name}.miss')
+        response = self._fetch(*key)
+        if response.get('success', False):
+            with self._lock:
+                self._entries[key] = response
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return response
+
+class Prefetcher:
+    """A few low-priority worker threads for speculative fetches"""
+
+    def __init__(self, idle=None, workers=PREFETCH_WORKERS, queue_size=PREFETCH_QUEUE_SIZE):
+        self._idle = idle or (lambda: True)
+        self._jobs = deque(maxlen=queue_size)
+        self._ready = threading.Condition()
+        for number in range(workers):
+            threading.Thread(target=self._work, name=f'prefetch-{number}', daemon=True).start()
+
+    def submit(self, func, *args):
+        """
+        Queue a speculative job, replacing the oldest one if the queue is full
+
+        Args:
+            func (callable): Called as func(*args)
+            *args: Arguments
+        """
+        with self._ready:
+            if len(self._jobs) == self._jobs.maxlen:
+                metrics.incr('prefetch.dropped')
+            self._jobs.append((func, args))
+            self._ready.notify()
+
+    def _work(self):
+        while True:
+            with self._ready:
+                while not self._jobs:
+                    self._ready.wait()
+                func, args = self._jobs.popleft()
+
+            if not self._idle():
+                metrics.incr('prefetch.dropped')
+                # Back off while live traffic is queued
+                time.sleep(0.1)
+                continue
+            try:
+                func(*args)
+                metrics.incr('prefetch.run')
+            except Exception as e:
+                logger.warning(f"Prefetch failed: {e}")
@@ -1,20 +1,44 @@
 import os
+import asyncio
 import logging
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import (
+    Application, ApplicationHandlerStop, CommandHandler, MessageHandler, TypeHandler, filters, ContextTypes
+)
 from quran_api import QuranAPI
 from utils import format_verse_message, format_search_results, parse_verse_command
+from throttle import SearchThrottle
+import metrics
+from update_tracker import UpdateTracker
+import log_setup
 
 # Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Quran API
 quran_api = QuranAPI()
 
+# Telegram user ids allowed to use admin commands
+ADMIN_IDS = {int(user_id) for user_id in os.environ.get('ADMIN_IDS', '').split(',') if user_id.strip()}
+
+# Durable record of handled updates, so replays after a restart are dropped
+update_tracker = UpdateTracker()
+
+# Rate limiting and debouncing of free-text searches
+search_throttle = SearchThrottle()
+metrics.register_gauge('search.tracked_users', search_throttle.tracked_users)
+
+async def drop_duplicate_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stop updates that were already handled before reaching any handler."""
+    # Every later log line of this update carries its id, chat and latency
+    log_setup.set_context(update.update_id, update.effective_chat.id if update.effective_chat else None)
+    # Written to disk before the handlers run, so a crash never replays it;
+    # the fsync runs in a worker thread so it does not stall the event loop
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, lambda: update_tracker.accept(update.update_id, durable=True)):
+        raise ApplicationHandlerStop
+
 # Command handlers
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
@@ -116,20 +140,16 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Perform search
     search_results = quran_api.search_verses(query)
     if 'error' in search_results:
-        await update.message.reply_text(f"Xato: {search_results['error']}")
-        await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=progress_message.message_id)
+        await progress_message.edit_text(f"Xato: {search_results['error']}")
         return
     
-    # Delete progress message
-    await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=progress_message.message_id)
-    
-    # Format and send results
+    # Replace the progress message with the results instead of deleting it and sending a new one
     if not search_results.get('verses', []):
-        await update.message.reply_text(f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
+        await progress_message.edit_text(f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
         return
     
-    formatted_results = format_search_results(search_results)
-    await update.message.reply_text(formatted_results, parse_mode='Markdown')
+    formatted_results = format_search_results(search_results['verses'])
+    await progress_message.edit_text(formatted_results, parse_mode='Markdown')
 
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Reply to unknown commands."""
@@ -137,12 +157,35 @@ async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         "Kechirasiz, bu buyruqni tushunmadim. /help yordam olish uchun."
     )
 
+async def botstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show runtime counters to admins."""
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    await update.message.reply_text(metrics.format_stats())
+
 async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Treat text as a search query."""
     query = update.message.text.strip()
     if not query:
         return
     
+    # Rapid messages from one chat collapse into a single search of the latest text
+    if search_throttle.submit(update.effective_chat.id, update):
+        context.application.create_task(debounced_search(update.effective_chat.id))
+
+async def debounced_search(chat_id: int) -> None:
+    """Search for the latest free-text message of a chat once its window closes."""
+    await asyncio.sleep(search_throttle.debounce)
+    update = search_throttle.flush(chat_id)
+    if update is None:
+        return
+    
+    if not search_throttle.allow(update.effective_user.id):
+        await update.message.reply_text("Juda ko'p so'rov yuborildi. Iltimos, biroz kuting.")
+        return
+    
+    query = update.message.text.strip()
+    
     # Send typing action
     await update.message.chat.send_action('typing')
     
@@ -152,20 +195,16 @@ async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     # Perform search
     search_results = quran_api.search_verses(query)
     if 'error' in search_results:
-        await update.message.reply_text(f"Xato: {search_results['error']}")
-        await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=progress_message.message_id)
+        await progress_message.edit_text(f"Xato: {search_results['error']}")
         return
     
-    # Delete progress message
-    await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=progress_message.message_id)
-    
-    # Format and send results
+    # Replace the progress message with the results instead of deleting it and sending a new one
     if not search_results.get('verses', []):
-        await update.message.reply_text(f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
+        await progress_message.edit_text(f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
         return
     
-    formatted_results = format_search_results(search_results)
-    await update.message.reply_text(formatted_results, parse_mode='Markdown')
+    formatted_results = format_search_results(search_results['verses'])
+    await progress_message.edit_text(formatted_results, parse_mode='Markdown')
 
 def main() -> None:
     """Start the bot."""
@@ -178,12 +217,16 @@ def main() -> None:
     # Create the Application
     application = Application.builder().token(token).build()
 
+    # Runs before every other handler group
+    application.add_handler(TypeHandler(Update, drop_duplicate_update), group=-1)
+    
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("verse", verse_command))
     application.add_handler(CommandHandler("surah", surah_command))
     application.add_handler(CommandHandler("search", search_command))
+    application.add_handler(CommandHandler("botstats", botstats_command))
     
     # Handle regular messages
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, echo))
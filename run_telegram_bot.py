@@ -3,14 +3,12 @@ This file is only for running the Telegram bot using the python-telegram-bot lib
 It is meant to be run as a standalone script, not imported.
 """
 import logging
+import log_setup
 import os
 import asyncio
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 async def main():
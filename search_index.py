@@ -0,0 +1,545 @@
+"""
+Local full-text search over the corpus columns.
+
+Each language gets a positional inverted index (term -> verses -> positions)
+built on first use. Queries are parsed locally and support:
+
+    rahmat mehribon         both words (AND is implicit)
+    rahmat OR marhamat      either word
+    rahmat NOT azob         exclusion, also written as -azob
+    "kechiruvchi mehribon"  exact phrase
+    jannat NEAR/5 daryo     words at most 5 positions apart
+    (rahmat OR nur) -azob   grouping
+
+Posting lists are sorted arrays. Phrases and NEAR intersect them starting
+from the shortest list with galloping search, and conjunctions walk their
+cheapest part and check the others per verse, so a rare term keeps a query
+cheap even when it also contains very common words.
+
+top() ranks matches by TF-IDF without scoring every match: it reads the
+postings of the query terms in order of decreasing term frequency and stops
+once no verse it has not seen yet can beat the k best found so far (see
+top_matches).
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+from corpus import Verse
+from surahs import TOTAL_VERSES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_LIMIT = 10
+
+_APOSTROPHES = str.maketrans({'ʼ': "'", 'ʻ': "'", '‘': "'", '’': "'", '`': "'"})
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)*")
+_QUERY_RE = re.compile(r'"[^"]*"|\(|\)|NEAR/\d+|-?[^\s()"]+')
+
+class QuerySyntaxError(ValueError):
+    """Raised when a search query cannot be parsed"""
+
+def tokenize(text):
+    """
+    Split text into normalized search terms
+
+    Args:
+        text (str): Verse text or query text
+
+    Returns:
+        list: Lowercase terms with apostrophes unified (o'g'il, ne'mat)
+    """
+    return _TOKEN_RE.findall(text.lower().translate(_APOSTROPHES))
+
+def _gallop(docs, target, low):
+    """Return the first position >= low where docs[position] >= target"""
+    step = 1
+    high = low
+    while high < len(docs) and docs[high] < target:
+        low = high + 1
+        high += step
+        step *= 2
+    return bisect_left(docs, target, low, min(high + 1, len(docs)))
+
+def intersect(lists):
+    """
+    Intersect sorted doc lists, smallest first, using galloping search
+
+    Args:
+        lists (list): Sorted sequences of verse indexes
+
+    Returns:
+        list: Verse indexes present in every list
+    """
+    if not lists:
+        return []
+    lists = sorted(lists, key=len)
+    result = list(lists[0])
+    for docs in lists[1:]:
+        if not result:
+            break
+        matched = []
+        position = 0
+        for doc in result:
+            position = _gallop(docs, doc, position)
+            if position == len(docs):
+                break
+            if docs[position] == doc:
+                matched.append(doc)
+        result = matched
+    return result
+
+class Postings:
+    """Sorted verse indexes of one term with the positions inside each verse"""
+
+    __slots__ = ('docs', 'offsets', 'positions', '_impact')
+
+    def __init__(self):
+        self.docs = array('H')
+        self.offsets = array('I', [0])
+        self.positions = array('H')
+        self._impact = None
+
+    def add(self, doc, position):
+        if not self.docs or self.docs[-1] != doc:
+            self.docs.append(doc)
+            self.offsets.append(self.offsets[-1])
+        self.positions.append(position)
+        self.offsets[-1] += 1
+
+    def positions_in(self, doc):
+        """Return the positions of the term inside a verse, or an empty slice"""
+        i = bisect_left(self.docs, doc)
+        if i == len(self.docs) or self.docs[i] != doc:
+            return self.positions[0:0]
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+    def by_impact(self):
+        """
+        Get the verses of the term ordered by term frequency, built on first use
+
+        Returns:
+            tuple: (docs, frequencies) arrays, highest frequency first and
+                verses of equal frequency in canonical order
+        """
+        if self._impact is None:
+            frequencies = [self.offsets[i + 1] - self.offsets[i] for i in range(len(self.docs))]
+            # sorted() is stable, so equal frequencies keep canonical order
+            order = sorted(range(len(self.docs)), key=lambda i: -frequencies[i])
+            self._impact = (array('H', (self.docs[i] for i in order)), array('H', (frequencies[i] for i in order)))
+        return self._impact
+
+def _weight(frequency, idf):
+    return (1 + math.log(frequency)) * idf
+
+_EMPTY = Postings()
+
+class PositionalIndex:
+    """Inverted index of one text column"""
+
+    def __init__(self, column):
+        self.language = column.language
+        self.column = column
+        self.postings = {}
+        for doc in range(len(column)):
+            for position, term in enumerate(tokenize(column.text(doc))):
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = Postings()
+                postings.add(doc, position)
+        logger.info(f"Built {self.language} search index with {len(self.postings)} terms")
+
+    def term(self, term):
+        """Return the postings of a normalized term"""
+        return self.postings.get(term, _EMPTY)
+
+    def docs(self, term):
+        """Return the sorted verse indexes containing a term"""
+        return self.term(term).docs
+
+    def score(self, terms, doc):
+        """
+        TF-IDF relevance of a verse for a set of query terms
+
+        Args:
+            terms (iterable): Normalized positive query terms
+            doc (int): Global verse index
+
+        Returns:
+            float: Sum of (1 + log tf) * log(N / df) over the terms in the verse
+        """
+        score = 0.0
+        for term in terms:
+            postings = self.term(term)
+            frequency = len(postings.positions_in(doc))
+            if frequency:
+                score += _weight(frequency, math.log(TOTAL_VERSES / len(postings.docs)))
+        return score
+
+    def phrase(self, terms):
+        """Return verses containing the terms as a consecutive phrase"""
+        postings = [self.term(term) for term in terms]
+        candidates = intersect([p.docs for p in postings])
+        matches = []
+        for doc in candidates:
+            starts = set(postings[0].positions_in(doc))
+            for offset, p in enumerate(postings[1:], 1):
+                starts &= {position - offset for position in p.positions_in(doc)}
+                if not starts:
+                    break
+            if starts:
+                matches.append(doc)
+        return matches
+
+    def near(self, left, right, distance):
+        """Return verses where two terms occur at most distance positions apart"""
+        left_postings, right_postings = self.term(left), self.term(right)
+        matches = []
+        for doc in intersect([left_postings.docs, right_postings.docs]):
+            right_positions = right_postings.positions_in(doc)
+            for position in left_postings.positions_in(doc):
+                i = bisect_left(right_positions, position - distance)
+                if i < len(right_positions) and right_positions[i] <= position + distance:
+                    matches.append(doc)
+                    break
+        return matches
+
+# Query syntax tree: ('term', t), ('phrase', [t...]), ('near', a, b, k),
+# ('and', [nodes]), ('or', [nodes]), ('not', node)
+
+def parse_query(query):
+    """
+    Parse a search query into a syntax tree
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        tuple: Root node of the query
+
+    Raises:
+        QuerySyntaxError: If the query is malformed or has no terms
+    """
+    tokens = _QUERY_RE.findall(query.translate(_APOSTROPHES))
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            advance()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nodes = []
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                advance()
+                continue
+            nodes.append(parse_unary())
+        if not nodes:
+            raise QuerySyntaxError("Qidiruv so'zi yetishmayapti")
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_unary():
+        token = peek()
+        if token is None:
+            raise QuerySyntaxError("NOT dan keyin so'z yetishmayapti")
+        if token == 'NOT':
+            advance()
+            return ('not', parse_unary())
+        if token.startswith('-') and len(token) > 1:
+            tokens[position] = token[1:]
+            return ('not', parse_unary())
+        return parse_primary()
+
+    def parse_primary():
+        token = advance()
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise QuerySyntaxError("Yopuvchi qavs ')' yetishmayapti")
+            advance()
+            return node
+        if token.startswith('"'):
+            terms = tokenize(token.strip('"'))
+            if not terms:
+                raise QuerySyntaxError("Bo'sh ibora")
+            return ('phrase', terms) if len(terms) > 1 else ('term', terms[0])
+
+        terms = tokenize(token)
+        if not terms:
+            raise QuerySyntaxError(f"Noto'g'ri so'z: {token}")
+        node = ('phrase', terms) if len(terms) > 1 else ('term', terms[0])
+
+        near = peek()
+        if near and near.startswith('NEAR/') and node[0] == 'term':
+            advance()
+            if peek() is None:
+                raise QuerySyntaxError("NEAR dan keyin so'z yetishmayapti")
+            right = tokenize(advance())
+            if not right:
+                raise QuerySyntaxError("NEAR dan keyin so'z yetishmayapti")
+            return ('near', node[1], right[0], int(near[5:]))
+        return node
+
+    tree = parse_or()
+    if peek() is not None:
+        raise QuerySyntaxError(f"Kutilmagan belgi: {peek()}")
+    return tree
+
+def query_terms(tree):
+    """
+    Collect the positive (non-negated) terms of a query tree
+
+    Args:
+        tree (tuple): Parsed query
+
+    Returns:
+        list: Terms that can contribute matches
+    """
+    kind = tree[0]
+    if kind == 'term':
+        return [tree[1]]
+    if kind == 'phrase':
+        return list(tree[1])
+    if kind == 'near':
+        return [tree[1], tree[2]]
+    if kind == 'not':
+        return []
+    terms = []
+    for node in tree[1]:
+        terms.extend(query_terms(node))
+    return terms
+
+def _contains(docs, doc):
+    i = bisect_left(docs, doc)
+    return i < len(docs) and docs[i] == doc
+
+def _cost(index, tree):
+    """Estimate how many verses a sub-query walks when used as the lead"""
+    kind = tree[0]
+    if kind == 'term':
+        return len(index.docs(tree[1]))
+    if kind == 'phrase':
+        return min(len(index.docs(term)) for term in tree[1])
+    if kind == 'near':
+        return min(len(index.docs(tree[1])), len(index.docs(tree[2])))
+    if kind == 'not':
+        return TOTAL_VERSES
+    if kind == 'or':
+        return sum(_cost(index, node) for node in tree[1])
+    return min(_cost(index, node) for node in tree[1])
+
+def matches(index, tree, doc):
+    """
+    Check whether a single verse matches a parsed query
+
+    Args:
+        index (PositionalIndex): Index of one language
+        tree (tuple): Parsed query
+        doc (int): Global verse index
+
+    Returns:
+        bool: True if the verse matches
+    """
+    kind = tree[0]
+    if kind == 'term':
+        return _contains(index.docs(tree[1]), doc)
+    if kind == 'phrase':
+        if not all(_contains(index.docs(term), doc) for term in tree[1]):
+            return False
+        starts = set(index.term(tree[1][0]).positions_in(doc))
+        for offset, term in enumerate(tree[1][1:], 1):
+            starts &= {position - offset for position in index.term(term).positions_in(doc)}
+        return bool(starts)
+    if kind == 'near':
+        left = index.term(tree[1]).positions_in(doc)
+        right = index.term(tree[2]).positions_in(doc)
+        return any(abs(a - b) <= tree[3] for a in left for b in right)
+    if kind == 'not':
+        return not matches(index, tree[1], doc)
+    if kind == 'or':
+        return any(matches(index, node, doc) for node in tree[1])
+    return all(matches(index, node, doc) for node in tree[1])
+
+def iter_matches(index, tree):
+    """
+    Lazily yield verse indexes matching a query, in canonical order
+
+    Conjunctions iterate their cheapest part and verify the rest verse by
+    verse, so taking the first k results never evaluates the whole query.
+
+    Args:
+        index (PositionalIndex): Index of one language
+        tree (tuple): Parsed query
+
+    Yields:
+        int: Matching verse indexes
+    """
+    kind = tree[0]
+    if kind == 'term':
+        yield from index.docs(tree[1])
+    elif kind == 'phrase':
+        yield from index.phrase(tree[1])
+    elif kind == 'near':
+        yield from index.near(tree[1], tree[2], tree[3])
+    elif kind == 'not':
+        for doc in range(TOTAL_VERSES):
+            if matches(index, tree, doc):
+                yield doc
+    elif kind == 'or':
+        previous = None
+        for doc in heapq.merge(*(iter_matches(index, node) for node in tree[1])):
+            if doc != previous:
+                previous = doc
+                yield doc
+    else:
+        lead = min(tree[1], key=lambda node: _cost(index, node))
+        rest = [node for node in tree[1] if node is not lead]
+        for doc in iter_matches(index, lead):
+            if all(matches(index, node, doc) for node in rest):
+                yield doc
+
+def top_matches(index, tree, limit):
+    """
+    Find the best-scoring verses of a query without scoring every match
+
+    A threshold algorithm: the query terms' postings are read in parallel in
+    Postings.by_impact order, and every verse seen is checked against the
+    query and scored. An unseen verse scores at most the sum of the weights
+    at the current read depth, so reading stops once the limit-th best
+    result beats that bound. Matches without any query term score 0 and
+    are taken last, in canonical order.
+
+    Args:
+        index (PositionalIndex): Index of one language
+        tree (tuple): Parsed query
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Verse indexes, best first; equal scores keep canonical order
+    """
+    terms = list(dict.fromkeys(query_terms(tree)))
+    lists = []
+    for term in terms:
+        postings = index.term(term)
+        idf = math.log(TOTAL_VERSES / len(postings.docs)) if postings.docs else 0.0
+        # A term found in every verse adds nothing to any score
+        if idf > 0:
+            lists.append((*postings.by_impact(), idf))
+
+    best = []  # min-heap of (score, -doc)
+    seen = set()
+    depth = 0
+    while limit > 0 and any(depth < len(docs) for docs, _, _ in lists):
+        threshold = 0.0
+        last = 0
+        for docs, frequencies, idf in lists:
+            if depth >= len(docs):
+                continue
+            doc = docs[depth]
+            threshold += _weight(frequencies[depth], idf)
+            last = max(last, doc)
+            if doc in seen:
+                continue
+            seen.add(doc)
+            if matches(index, tree, doc):
+                entry = (index.score(terms, doc), -doc)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+        depth += 1
+        # Reaching the bound exactly takes the current frequency in every
+        # list, and those verses come after the ones just read
+        if len(best) == limit and best[0] >= (threshold, -last):
+            break
+
+    docs = [-doc for _, doc in sorted(best, reverse=True)]
+    if len(docs) < limit:
+        for doc in iter_matches(index, tree):
+            if doc not in seen:
+                docs.append(doc)
+                if len(docs) == limit:
+                    break
+    return docs
+
+class SearchEngine:
+    """Builds indexes per language on demand and answers search queries"""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def languages(self):
+        """Return the languages whose index is already built"""
+        return list(self._indexes)
+
+    def index(self, language):
+        """
+        Get the index of a language, building it on first use
+
+        Args:
+            language (str): Language code
+
+        Returns:
+            PositionalIndex: Index, or None if the language is not available
+        """
+        index = self._indexes.get(language)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._indexes.get(language)
+            if index is None:
+                column = self.corpus.store.column(language)
+                if column is None:
+                    return None
+                index = self._indexes[language] = PositionalIndex(column)
+        return index
+
+    def top(self, query, language, limit=DEFAULT_RESULTS_LIMIT):
+        """
+        Get the most relevant results of a query
+
+        Matches are ranked by PositionalIndex.score; equal scores keep
+        canonical order. See top_matches.
+
+        Args:
+            query (str): Query text
+            language (str): Language code
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Verse records, best first, or None if the language has no
+                local index
+
+        Raises:
+            QuerySyntaxError: If the query cannot be parsed
+        """
+        index = self.index(language)
+        if index is None:
+            return None
+        tree = parse_query(query)
+        return [self._result(index, doc) for doc in top_matches(index, tree, limit)]
+
+    def _result(self, index, doc):
+        return Verse(doc, None, index.column)
+
+def get_search_engine():
+    """Return the search engine of the current snapshot (see snapshot.py)"""
+    from snapshot import current
+    return current().engine
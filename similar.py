@@ -0,0 +1,190 @@
+"""
+Related-verse lookup with TF-IDF cosine similarity.
+
+Every verse of a language is turned into a TF-IDF vector. To keep the matrix
+small enough to hold in each worker, the sparse vectors are reduced with a
+fixed random projection to SIMILAR_DIMENSIONS columns, which preserves cosine
+similarity closely. The resulting float32 matrix is saved as
+data/similar/<lang>.npy and memory-mapped on later starts.
+
+Neighbours are found with one matrix-vector product and argpartition.
+"""
+import logging
+import math
+import os
+
+import numpy as np
+
+from snapshot import current, register
+from corpus import Verse
+from surahs import TOTAL_VERSES, verse_index
+from utils import parse_verse_command
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_DIMENSIONS = int(os.environ.get('SIMILAR_DIMENSIONS', '256'))
+SIMILAR_RESULTS_LIMIT = 5
+
+# Verses whose neighbour lists are computed ahead of time
+SIMILAR_PRECOMPUTE = os.environ.get('SIMILAR_PRECOMPUTE', '1:1,1:2,2:255,2:286,3:190,55:13,112:1,113:1,114:1')
+
+def parse_precompute(value):
+    """
+    Parse a comma separated list of surah:ayah references
+
+    Args:
+        value (str): e.g. "1:1,2:255"
+
+    Returns:
+        list: Global verse indexes; invalid entries are logged and skipped
+    """
+    docs = []
+    for key in value.split(','):
+        if not key.strip():
+            continue
+        surah, ayah = parse_verse_command(key)
+        if surah is None:
+            logger.warning(f"Ignoring invalid verse {key!r} in SIMILAR_PRECOMPUTE")
+            continue
+        docs.append(verse_index(surah, ayah))
+    return docs
+
+def build_matrix(index, dimensions=SIMILAR_DIMENSIONS):
+    """
+    Build the projected TF-IDF matrix of a positional index
+
+    Args:
+        index (search_index.PositionalIndex): Index of one language
+        dimensions (int): Number of columns after projection
+
+    Returns:
+        numpy.ndarray: (TOTAL_VERSES, dimensions) float32 matrix with unit rows
+    """
+    rng = np.random.default_rng(0)
+    matrix = np.zeros((TOTAL_VERSES, dimensions), dtype=np.float32)
+
+    for postings in index.postings.values():
+        docs = np.frombuffer(postings.docs, dtype=np.uint16)
+        offsets = np.frombuffer(postings.offsets, dtype=np.uint32)
+        idf = math.log(TOTAL_VERSES / len(docs))
+        if idf == 0:
+            continue
+        weights = (1 + np.log(np.diff(offsets).astype(np.float32))) * idf
+        direction = rng.standard_normal(dimensions).astype(np.float32)
+        matrix[docs] += np.outer(weights, direction)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+class SimilarityIndex:
+    """Finds the verses closest to a given verse"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self._precomputed = {}
+
+    @classmethod
+    def load_or_build(cls, index, store, data_dir):
+        """
+        Memory-map the saved matrix of a language, building it if missing or stale
+
+        Args:
+            index (search_index.PositionalIndex): Index of the language
+            store (corpus.TranslationStore): Columns the index was built from
+            data_dir (str): Corpus data directory
+
+        Returns:
+            SimilarityIndex: Ready index
+        """
+        path = os.path.join(data_dir, 'similar', f"{index.language}.npy")
+        if os.path.exists(path):
+            matrix = np.load(path, mmap_mode='r')
+            if matrix.shape != (TOTAL_VERSES, SIMILAR_DIMENSIONS):
+                logger.warning(f"Ignoring {path} with shape {matrix.shape}")
+            elif store.changed_since(path, [index.language]):
+                logger.info(f"Rebuilding {path}, the {index.language} column changed")
+            else:
+                return cls(matrix)
+
+        matrix = build_matrix(index)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Older snapshots may still memory-map the old matrix, so never overwrite it in place
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, matrix)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Could not save similarity matrix {path}: {e}")
+        return cls(matrix)
+
+    def neighbours(self, doc, limit=SIMILAR_RESULTS_LIMIT):
+        """
+        Get the most similar verses
+
+        Args:
+            doc (int): Global verse index
+            limit (int): Number of neighbours
+
+        Returns:
+            list: (verse index, score) pairs, best first
+        """
+        cached = self._precomputed.get(doc)
+        if cached is not None and len(cached) >= limit:
+            return cached[:limit]
+
+        scores = self.matrix @ self.matrix[doc]
+        scores[doc] = -np.inf
+        top = np.argpartition(-scores, limit)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def precompute(self, docs, limit=SIMILAR_RESULTS_LIMIT):
+        """Store neighbour lists for frequently requested verses"""
+        for doc in docs:
+            self._precomputed[doc] = self.neighbours(doc, limit)
+
+def _build_similarity_index(snapshot, language):
+    index = snapshot.engine.index(language)
+    if index is None:
+        return None
+    similarity = SimilarityIndex.load_or_build(index, snapshot.corpus.store, snapshot.corpus.data_dir)
+    similarity.precompute(parse_precompute(SIMILAR_PRECOMPUTE))
+    return similarity
+
+register('similar', _build_similarity_index)
+
+def get_similarity_index(language):
+    """
+    Return the similarity index of a language, creating it on first use
+
+    Args:
+        language (str): Language code
+
+    Returns:
+        SimilarityIndex: Index, or None if the language has no local corpus
+    """
+    return current().get('similar', language)
+
+def similar_verses(surah, ayah, language, limit=SIMILAR_RESULTS_LIMIT):
+    """
+    Find verses related to surah:ayah
+
+    Args:
+        surah (int): Surah number
+        ayah (int): Ayah number
+        language (str): Language code
+        limit (int): Number of results
+
+    Returns:
+        list: Verse records accepted by utils.format_search_results,
+            or None if the language has no local corpus
+    """
+    snapshot = current()
+    similarity = snapshot.get('similar', language)
+    if similarity is None:
+        return None
+
+    column = snapshot.engine.index(language).column
+    return [Verse(doc, None, column) for doc, _score in similarity.neighbours(verse_index(surah, ayah), limit)]
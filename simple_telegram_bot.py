@@ -4,12 +4,10 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from quran_api import QuranAPI
 from utils import format_verse_message, format_search_results, parse_verse_command
+import log_setup
 
 # Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Quran API
@@ -0,0 +1,186 @@
+"""
+Versioned corpus snapshots with zero-downtime hot reload.
+
+Handlers reach the corpus, the search engine and every structure derived from
+them (vocabulary filter, completers, concordances, similarity matrices)
+through current(), which returns one immutable Snapshot. A reload builds and
+warms a complete new snapshot in the background, validates it, and then
+replaces the reference with a single assignment. Requests that already hold
+the old snapshot finish against it, and nothing is torn down under them.
+
+A reload is triggered with SIGHUP or the /reload admin command.
+"""
+import contextvars
+import hashlib
+import logging
+import signal
+import threading
+import time
+
+from corpus import ARABIC, DATA_DIR, Corpus
+from ingest import load_manifest
+from search_index import SearchEngine
+
+logger = logging.getLogger(__name__)
+
+# name -> factory(snapshot, key) for structures derived from a snapshot
+_factories = {}
+
+def register(name, factory):
+    """
+    Register how a derived structure is built for a snapshot
+
+    Args:
+        name (str): Structure name, e.g. "bloom"
+        factory (callable): factory(snapshot, key) returning the structure,
+            or None if it cannot be built from this snapshot
+    """
+    _factories[name] = factory
+
+# Cached in place of None, so a structure that cannot be built is not retried on every call
+_MISSING = object()
+
+class Snapshot:
+    """One consistent version of the corpus and everything derived from it"""
+
+    def __init__(self, corpus, version=1):
+        self.corpus = corpus
+        self.engine = SearchEngine(corpus)
+        self.version = version
+        self.loaded_at = time.time()
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    def get(self, name, key=None):
+        """
+        Get a derived structure, building it on first use
+
+        Args:
+            name (str): Registered structure name
+            key: Structure key, usually a language code
+
+        Returns:
+            The structure, or None if the factory could not build it
+        """
+        value = self._derived.get((name, key))
+        if value is None:
+            with self._lock:
+                value = self._derived.get((name, key))
+                if value is None:
+                    value = _factories[name](self, key)
+                    self._derived[(name, key)] = _MISSING if value is None else value
+        return None if value is _MISSING else value
+
+    def derived(self):
+        """Return the derived structures built so far as {(name, key): structure}"""
+        return {name_key: value for name_key, value in list(self._derived.items()) if value is not _MISSING}
+
+    def warm_like(self, other):
+        """Build every index and derived structure that other already has"""
+        for language in other.engine.languages():
+            self.engine.index(language)
+        for name, key in list(other._derived):
+            self.get(name, key)
+
+class ReloadError(RuntimeError):
+    """Raised when a new snapshot fails validation"""
+
+_current = None
+_current_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+def current():
+    """Return the snapshot new requests should use"""
+    global _current
+    if _current is None:
+        with _current_lock:
+            if _current is None:
+                _current = Snapshot(Corpus())
+    return _current
+
+def load_snapshot(data_dir=DATA_DIR, version=1):
+    """
+    Load and validate a snapshot from a data directory
+
+    Args:
+        data_dir (str): Corpus data directory
+        version (int): Version number of the new snapshot
+
+    Returns:
+        Snapshot: Fully loaded snapshot
+
+    Raises:
+        ReloadError: If the Arabic column is missing, any column is invalid
+            or a column does not match its checksum in manifest.json
+    """
+    snapshot = Snapshot(Corpus(data_dir), version)
+    if not snapshot.corpus.is_available():
+        raise ReloadError(f"No Arabic column in {data_dir}")
+    try:
+        manifest = load_manifest(data_dir)
+    except (OSError, ValueError) as e:
+        raise ReloadError(f"Could not read manifest.json: {e}") from e
+
+    # Loading every column checks that each one has exactly TOTAL_VERSES lines;
+    # the store logs why a column could not be loaded
+    for language in [ARABIC] + snapshot.corpus.store.languages():
+        column = snapshot.corpus.store.column(language)
+        if column is None:
+            raise ReloadError(f"Invalid {language} column")
+        # Columns placed by hand have no manifest entry and are only length-checked
+        expected = manifest.get(language, {}).get('column_sha256')
+        if expected and hashlib.sha256(column.blob).hexdigest() != expected:
+            raise ReloadError(f"{language} column does not match its checksum in manifest.json")
+    return snapshot
+
+def reload(data_dir=None):
+    """
+    Load, validate and warm a new snapshot, then swap it in
+
+    Args:
+        data_dir (str): Data directory, defaults to the current one
+
+    Returns:
+        Snapshot: The snapshot now in use
+
+    Raises:
+        ReloadError: If the new snapshot is invalid; the old one stays active
+    """
+    global _current
+    with _reload_lock:
+        old = current()
+        started = time.monotonic()
+        new = load_snapshot(data_dir or old.corpus.data_dir, old.version + 1)
+        new.warm_like(old)
+        # A single reference assignment: requests see either the old or the new snapshot
+        _current = new
+        logger.info(f"Swapped in corpus snapshot v{new.version} in {time.monotonic() - started:.1f}s")
+        return new
+
+def reload_in_background(on_done=None):
+    """
+    Reload in a background thread
+
+    Args:
+        on_done (callable): Called with (snapshot, error) when finished, in
+            the caller's context variables
+    """
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            snapshot = reload()
+        except Exception as e:
+            logger.error(f"Corpus reload failed, keeping v{current().version}: {e}")
+            if on_done:
+                context.run(on_done, None, e)
+            return
+        if on_done:
+            context.run(on_done, snapshot, None)
+
+    threading.Thread(target=run, name='corpus-reload', daemon=True).start()
+
+def install_signal_handler():
+    """Reload the corpus on SIGHUP where the platform supports it"""
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_in_background())
@@ -0,0 +1,270 @@
+"""
+Static surah tables of the Qur'on: names, verse counts and revelation places.
+
+Verses are addressed either as (surah, ayah) pairs or as a global verse
+index (0..6235) in canonical order, which is how the local corpus stores them.
+"""
+import sys
+from array import array
+from bisect import bisect_right
+
+SURAH_COUNT = 114
+
+class Surah:
+    """Static metadata of one surah"""
+
+    __slots__ = ('number', 'name_simple', 'name_arabic', 'verses_count', 'revelation_place')
+
+    def __init__(self, number, name_simple, name_arabic, verses_count, revelation_place):
+        self.number = number
+        # Interned, so every verse record of a surah shares one name object
+        self.name_simple = sys.intern(name_simple)
+        self.name_arabic = sys.intern(name_arabic)
+        self.verses_count = verses_count
+        self.revelation_place = sys.intern(revelation_place)
+
+    def __repr__(self):
+        return f"Surah({self.number}, {self.name_simple!r})"
+
+    def as_dict(self):
+        """
+        Convert to the dict shape expected by utils.format_surah_info
+
+        Returns:
+            dict: Surah data
+        """
+        return {
+            'id': self.number,
+            'name_simple': self.name_simple,
+            'name_arabic': self.name_arabic,
+            'verses_count': self.verses_count,
+            'revelation_place': self.revelation_place,
+        }
+
+# (name_simple, name_arabic, verses_count, revelation_place), surah 1 first
+_SURAH_ROWS = (
+    ('Al-Fatihah', 'الفاتحة', 7, 'makkah'),
+    ('Al-Baqarah', 'البقرة', 286, 'madinah'),
+    ("Ali 'Imran", 'آل عمران', 200, 'madinah'),
+    ('An-Nisa', 'النساء', 176, 'madinah'),
+    ("Al-Ma'idah", 'المائدة', 120, 'madinah'),
+    ("Al-An'am", 'الأنعام', 165, 'makkah'),
+    ("Al-A'raf", 'الأعراف', 206, 'makkah'),
+    ('Al-Anfal', 'الأنفال', 75, 'madinah'),
+    ('At-Tawbah', 'التوبة', 129, 'madinah'),
+    ('Yunus', 'يونس', 109, 'makkah'),
+    ('Hud', 'هود', 123, 'makkah'),
+    ('Yusuf', 'يوسف', 111, 'makkah'),
+    ("Ar-Ra'd", 'الرعد', 43, 'madinah'),
+    ('Ibrahim', 'إبراهيم', 52, 'makkah'),
+    ('Al-Hijr', 'الحجر', 99, 'makkah'),
+    ('An-Nahl', 'النحل', 128, 'makkah'),
+    ('Al-Isra', 'الإسراء', 111, 'makkah'),
+    ('Al-Kahf', 'الكهف', 110, 'makkah'),
+    ('Maryam', 'مريم', 98, 'makkah'),
+    ('Taha', 'طه', 135, 'makkah'),
+    ('Al-Anbya', 'الأنبياء', 112, 'makkah'),
+    ('Al-Hajj', 'الحج', 78, 'madinah'),
+    ("Al-Mu'minun", 'المؤمنون', 118, 'makkah'),
+    ('An-Nur', 'النور', 64, 'madinah'),
+    ('Al-Furqan', 'الفرقان', 77, 'makkah'),
+    ("Ash-Shu'ara", 'الشعراء', 227, 'makkah'),
+    ('An-Naml', 'النمل', 93, 'makkah'),
+    ('Al-Qasas', 'القصص', 88, 'makkah'),
+    ("Al-'Ankabut", 'العنكبوت', 69, 'makkah'),
+    ('Ar-Rum', 'الروم', 60, 'makkah'),
+    ('Luqman', 'لقمان', 34, 'makkah'),
+    ('As-Sajdah', 'السجدة', 30, 'makkah'),
+    ('Al-Ahzab', 'الأحزاب', 73, 'madinah'),
+    ('Saba', 'سبإ', 54, 'makkah'),
+    ('Fatir', 'فاطر', 45, 'makkah'),
+    ('Ya-Sin', 'يس', 83, 'makkah'),
+    ('As-Saffat', 'الصافات', 182, 'makkah'),
+    ('Sad', 'ص', 88, 'makkah'),
+    ('Az-Zumar', 'الزمر', 75, 'makkah'),
+    ('Ghafir', 'غافر', 85, 'makkah'),
+    ('Fussilat', 'فصلت', 54, 'makkah'),
+    ('Ash-Shuraa', 'الشورى', 53, 'makkah'),
+    ('Az-Zukhruf', 'الزخرف', 89, 'makkah'),
+    ('Ad-Dukhan', 'الدخان', 59, 'makkah'),
+    ('Al-Jathiyah', 'الجاثية', 37, 'makkah'),
+    ('Al-Ahqaf', 'الأحقاف', 35, 'makkah'),
+    ('Muhammad', 'محمد', 38, 'madinah'),
+    ('Al-Fath', 'الفتح', 29, 'madinah'),
+    ('Al-Hujurat', 'الحجرات', 18, 'madinah'),
+    ('Qaf', 'ق', 45, 'makkah'),
+    ('Adh-Dhariyat', 'الذاريات', 60, 'makkah'),
+    ('At-Tur', 'الطور', 49, 'makkah'),
+    ('An-Najm', 'النجم', 62, 'makkah'),
+    ('Al-Qamar', 'القمر', 55, 'makkah'),
+    ('Ar-Rahman', 'الرحمن', 78, 'madinah'),
+    ("Al-Waqi'ah", 'الواقعة', 96, 'makkah'),
+    ('Al-Hadid', 'الحديد', 29, 'madinah'),
+    ('Al-Mujadila', 'المجادلة', 22, 'madinah'),
+    ('Al-Hashr', 'الحشر', 24, 'madinah'),
+    ('Al-Mumtahanah', 'الممتحنة', 13, 'madinah'),
+    ('As-Saf', 'الصف', 14, 'madinah'),
+    ("Al-Jumu'ah", 'الجمعة', 11, 'madinah'),
+    ('Al-Munafiqun', 'المنافقون', 11, 'madinah'),
+    ('At-Taghabun', 'التغابن', 18, 'madinah'),
+    ('At-Talaq', 'الطلاق', 12, 'madinah'),
+    ('At-Tahrim', 'التحريم', 12, 'madinah'),
+    ('Al-Mulk', 'الملك', 30, 'makkah'),
+    ('Al-Qalam', 'القلم', 52, 'makkah'),
+    ('Al-Haqqah', 'الحاقة', 52, 'makkah'),
+    ("Al-Ma'arij", 'المعارج', 44, 'makkah'),
+    ('Nuh', 'نوح', 28, 'makkah'),
+    ('Al-Jinn', 'الجن', 28, 'makkah'),
+    ('Al-Muzzammil', 'المزمل', 20, 'makkah'),
+    ('Al-Muddaththir', 'المدثر', 56, 'makkah'),
+    ('Al-Qiyamah', 'القيامة', 40, 'makkah'),
+    ('Al-Insan', 'الانسان', 31, 'madinah'),
+    ('Al-Mursalat', 'المرسلات', 50, 'makkah'),
+    ('An-Naba', 'النبإ', 40, 'makkah'),
+    ("An-Nazi'at", 'النازعات', 46, 'makkah'),
+    ("'Abasa", 'عبس', 42, 'makkah'),
+    ('At-Takwir', 'التكوير', 29, 'makkah'),
+    ('Al-Infitar', 'الإنفطار', 19, 'makkah'),
+    ('Al-Mutaffifin', 'المطففين', 36, 'makkah'),
+    ('Al-Inshiqaq', 'الإنشقاق', 25, 'makkah'),
+    ('Al-Buruj', 'البروج', 22, 'makkah'),
+    ('At-Tariq', 'الطارق', 17, 'makkah'),
+    ("Al-A'la", 'الأعلى', 19, 'makkah'),
+    ('Al-Ghashiyah', 'الغاشية', 26, 'makkah'),
+    ('Al-Fajr', 'الفجر', 30, 'makkah'),
+    ('Al-Balad', 'البلد', 20, 'makkah'),
+    ('Ash-Shams', 'الشمس', 15, 'makkah'),
+    ('Al-Layl', 'الليل', 21, 'makkah'),
+    ('Ad-Duhaa', 'الضحى', 11, 'makkah'),
+    ('Ash-Sharh', 'الشرح', 8, 'makkah'),
+    ('At-Tin', 'التين', 8, 'makkah'),
+    ("Al-'Alaq", 'العلق', 19, 'makkah'),
+    ('Al-Qadr', 'القدر', 5, 'makkah'),
+    ('Al-Bayyinah', 'البينة', 8, 'madinah'),
+    ('Az-Zalzalah', 'الزلزلة', 8, 'madinah'),
+    ("Al-'Adiyat", 'العاديات', 11, 'makkah'),
+    ("Al-Qari'ah", 'القارعة', 11, 'makkah'),
+    ('At-Takathur', 'التكاثر', 8, 'makkah'),
+    ("Al-'Asr", 'العصر', 3, 'makkah'),
+    ('Al-Humazah', 'الهمزة', 9, 'makkah'),
+    ('Al-Fil', 'الفيل', 5, 'makkah'),
+    ('Quraysh', 'قريش', 4, 'makkah'),
+    ("Al-Ma'un", 'الماعون', 7, 'makkah'),
+    ('Al-Kawthar', 'الكوثر', 3, 'makkah'),
+    ('Al-Kafirun', 'الكافرون', 6, 'makkah'),
+    ('An-Nasr', 'النصر', 3, 'madinah'),
+    ('Al-Masad', 'المسد', 5, 'makkah'),
+    ('Al-Ikhlas', 'الإخلاص', 4, 'makkah'),
+    ('Al-Falaq', 'الفلق', 5, 'makkah'),
+    ('An-Nas', 'الناس', 6, 'makkah'),
+)
+
+SURAHS = tuple(Surah(number, *row) for number, row in enumerate(_SURAH_ROWS, 1))
+del _SURAH_ROWS
+
+# Number of verses in each surah, surah 1 first
+VERSE_COUNTS = tuple(surah.verses_count for surah in SURAHS)
+
+TOTAL_VERSES = sum(VERSE_COUNTS)
+
+# Global index of the first verse of each surah
+_FIRST_INDEX = array('H', [0])
+for _count in VERSE_COUNTS:
+    _FIRST_INDEX.append(_FIRST_INDEX[-1] + _count)
+del _count
+
+def _name_key(name):
+    """Normalize a surah name for lookup ("Al-Fatihah" -> "alfatihah")"""
+    return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+# Lookup keys: full transliteration, transliteration without the article,
+# spellings without the final "h" (Fatiha, Baqara) and the Arabic name
+_BY_NAME = {}
+for _surah in SURAHS:
+    _names = [_surah.name_simple, _surah.name_arabic]
+    _article, _, _rest = _surah.name_simple.partition('-')
+    if _rest and _article.lower() in ('al', 'an', 'ar', 'as', 'at', 'ash', 'ad', 'adh', 'az'):
+        _names.append(_rest)
+    for _name in list(_names):
+        if _name.endswith('ah'):
+            _names.append(_name[:-1])
+    for _name in _names:
+        _BY_NAME.setdefault(_name_key(_name), _surah)
+del _surah, _names, _name, _article, _rest
+
+def get_surah(number):
+    """
+    Get surah metadata by number
+
+    Args:
+        number (int): Surah number (1-114)
+
+    Returns:
+        Surah: Surah metadata, or None for an invalid number
+    """
+    if not 1 <= number <= SURAH_COUNT:
+        return None
+    return SURAHS[number - 1]
+
+def find_surah(text):
+    """
+    Get surah metadata by number, transliteration or Arabic name
+
+    Args:
+        text (str): e.g. "36", "Ya-Sin", "yasin", "baqara" or "البقرة"
+
+    Returns:
+        Surah: Surah metadata, or None if nothing matches
+    """
+    text = text.strip()
+    if text.isdigit():
+        return get_surah(int(text))
+    return _BY_NAME.get(_name_key(text))
+
+def verse_count(surah):
+    """
+    Get the number of verses in a surah
+
+    Args:
+        surah (int): Surah number (1-114)
+
+    Returns:
+        int: Verse count, or 0 for an invalid surah number
+    """
+    if not 1 <= surah <= SURAH_COUNT:
+        return 0
+    return VERSE_COUNTS[surah - 1]
+
+def is_valid_verse(surah, ayah):
+    """Check that a surah:ayah pair exists"""
+    return 1 <= ayah <= verse_count(surah)
+
+def verse_index(surah, ayah):
+    """
+    Convert a surah:ayah pair to its global verse index
+
+    Args:
+        surah (int): Surah number
+        ayah (int): Ayah number
+
+    Returns:
+        int: Index in canonical order, or None if the verse does not exist
+    """
+    if not is_valid_verse(surah, ayah):
+        return None
+    return _FIRST_INDEX[surah - 1] + ayah - 1
+
+def verse_ref(index):
+    """
+    Convert a global verse index back to a surah:ayah pair
+
+    Args:
+        index (int): Index in canonical order
+
+    Returns:
+        tuple: (surah, ayah)
+    """
+    if not 0 <= index < TOTAL_VERSES:
+        raise IndexError(f"verse index {index} out of range")
+    surah = bisect_right(_FIRST_INDEX, index)
+    return surah, index - _FIRST_INDEX[surah - 1] + 1
@@ -4,81 +4,311 @@ This is a simpler implementation that avoids package conflicts.
 """
 import os
 import logging
+import contextvars
+import threading
+import time
 import telebot
+from telebot import types
 from quran_api import QuranAPI
-from utils import format_verse_message, format_search_results, parse_verse_command
+from utils import (
+    format_verse_message, format_search_results, parse_verse_command,
+    parse_verse_references, pack_messages, format_word_stats, MAX_REMOTE_VERSES
+)
+from audio_cache import AudioCache, AUDIO_CACHE_FILE
+from corpus import get_corpus, LanguagePreferences, DEFAULT_LANGUAGE
+from surahs import find_surah, verse_index, verse_ref, TOTAL_VERSES
+from divisions import get_division, JUZ, PAGE
+from search_index import get_search_engine, QuerySyntaxError, tokenize
+from similar import similar_verses
+from throttle import SearchThrottle
+from bloom import is_hopeless
+from autocomplete import get_autocompleter, did_you_mean
+from concordance import word_stats
+import metrics
+import memory
+import snapshot
+from update_tracker import UpdateTracker, UPDATE_STATE_FILE
+import hosting
+import locales
+import http_session
+import log_setup
+from admission import AdmissionController, telebot_priority, ECHO
+from popularity import PopularityTracker, warm_snapshot, query_key, VERSE, QUERY, LANGUAGE, WARM_VERSES, WARM_QUERIES
+from prefetch import ResponseCache, Prefetcher, PREFETCH_AHEAD
 
 # Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Quran API
 quran_api = QuranAPI()
 
+# Remote API responses, used when the local corpus is not installed
+remote_verses = ResponseCache('remote_verses', quran_api.get_verse)
+remote_searches = ResponseCache('remote_searches', quran_api.search_verses)
+
+# What readers ask for most, used to warm caches after a restart
+popularity = PopularityTracker()
+
+# Translation language chosen by each user
+user_languages = LanguagePreferences()
+
 # Create bot instance
 TOKEN = os.environ.get('TELEGRAM_TOKEN')
 if not TOKEN:
     logger.error("TELEGRAM_TOKEN environment variable not set!")
     exit(1)
 
-bot = telebot.TeleBot(TOKEN)
+# Interface locale of the main bot, see locales.py
+BOT_LOCALE = os.environ.get('BOT_LOCALE', locales.DEFAULT_LOCALE)
+MAIN_BOT = 'main'
+
+# All handler threads share one pooled keep-alive connection to the Bot API
+http_session.install()
+
+# Commands run before /search and free-text searches, and stale work is shed
+admission = AdmissionController()
+
+# Speculative fetches run only while no live request is queued
+prefetcher = Prefetcher(idle=lambda: admission.pending() == 0)
+
+def ui_text(key, **values):
+    """Get an interface text (see locales.py) in the locale of the active bot"""
+    return locales.text(key, hosting.active().locale, **values)
+
+def reply_busy(message):
+    """Tell the user their request was dropped under load"""
+    bot.reply_to(message, ui_text('busy'))
+
+def bot_file(path, name):
+    """Per-bot variant of a state file: update_state.json -> update_state.ru.json"""
+    if name == MAIN_BOT:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{name}{extension}"
+
+def create_bot(name, token, locale=BOT_LOCALE, language=DEFAULT_LANGUAGE, commands=None):
+    """
+    Create one bot of this process
+
+    The bot gets its own update offset and Telegram file_id cache; its
+    handlers are the ones declared in this module (see hosting.copy_handlers).
+
+    Args:
+        name (str): Bot name, used in state file names
+        token (str): Bot API token
+        locale (str): Interface locale
+        language (str): Translation shown until a user picks one with /lang
+        commands (list): Commands the bot answers, or None for all
+
+    Returns:
+        hosting.HostedBot: The bot
+    """
+    telegram_bot = telebot.TeleBot(token)
+    hosted = hosting.HostedBot(name, telegram_bot, locale, language, commands)
+    
+    # Telegram file_ids of already uploaded recitation clips; they are only valid for this bot
+    hosted.audio_cache = AudioCache(bot_file(AUDIO_CACHE_FILE, name))
+    
+    # Resume polling after the last handled update and drop replayed ones
+    update_tracker = hosted.update_tracker = UpdateTracker(bot_file(UPDATE_STATE_FILE, name))
+    telegram_bot.last_update_id = update_tracker.last_update_id
+    _process_new_updates = telegram_bot.process_new_updates
+    
+    def process_new_updates(updates):
+        """Pass only updates that were not handled before to the handlers"""
+        fresh = [update for update in updates if update_tracker.accept(update.update_id)]
+        # One fsync per batch before any handler runs, so a crash never replays handled updates
+        update_tracker.flush()
+        received_at = time.monotonic()
+        for update in fresh:
+            # Handlers run on worker threads; the stamp lets their logs name the update
+            for event in (update.message, update.edited_message, update.inline_query, update.callback_query):
+                if event is not None:
+                    chat = getattr(event, 'chat', None) or getattr(event, 'from_user', None)
+                    event.log_context = (update.update_id, chat.id if chat else None, received_at)
+        if fresh:
+            _process_new_updates(fresh)
+    
+    def exec_task(task, *args, **kwargs):
+        """Queue a handler task by priority, inside the log context of its update"""
+        event = args[0] if args else None
+        context = getattr(event, 'log_context', None)
+        if context is not None:
+            task = log_setup.bind(task, *context)
+        priority = telebot_priority(event)
+        on_shed = (lambda: reply_busy(event)) if isinstance(event, types.Message) else None
+        # The worker thread runs the task with this bot active
+        with hosting.activate(hosted):
+            if priority != ECHO:
+                admission.submit(priority, lambda: task(*args, **kwargs), on_shed=on_shed)
+                return
+            # Free text only opens a debounce window here; its search is admitted
+            # once, as ECHO, when the window closes (see schedule_debounced_search)
+            try:
+                task(*args, **kwargs)
+            except Exception as e:
+                logger.exception(f"Error in free-text handler: {e}")
+    
+    telegram_bot.process_new_updates = process_new_updates
+    telegram_bot._exec_task = exec_task
+    
+    memory.register(f'audio_file_ids.{name}', lambda: hosted.audio_cache)
+    memory.register(f'update_tracker.{name}', lambda: hosted.update_tracker)
+    return hosted
+
+main_bot = create_bot(MAIN_BOT, TOKEN)
+hosting.set_default(main_bot)
+
+# Handlers below use `bot`, which always refers to the bot whose update is being handled
+bot = hosting.BotProxy()
+
+# Telegram user ids allowed to use admin commands
+ADMIN_IDS = {int(user_id) for user_id in os.environ.get('ADMIN_IDS', '').split(',') if user_id.strip()}
+
+# Rate limiting and debouncing of free-text searches
+search_throttle = SearchThrottle()
+metrics.register_gauge('search.tracked_users', search_throttle.tracked_users)
+
+# Inline queries arrive per keystroke and each runs several searches
+inline_throttle = SearchThrottle(name='inline')
+metrics.register_gauge('inline.tracked_users', inline_throttle.tracked_users)
+
+# Caches outside the corpus snapshot, shown by /memory
+memory.register('user_languages', lambda: user_languages)
+memory.register('search_throttle', lambda: search_throttle)
+memory.register('inline_throttle', lambda: inline_throttle)
 
 # Command handlers
 @bot.message_handler(commands=['start'])
 def start_command(message):
     """Handle the /start command"""
-    user_first_name = message.from_user.first_name
-    bot.reply_to(message, 
-        f"Assalomu alaykum, {user_first_name}! 🌙\n\n"
-        "Qurʼon botiga xush kelibsiz. Bu bot sizga Qurʼon oyatlarini o'qish, qidirish va ulashish imkonini beradi.\n\n"
-        "Buyruqlar:\n"
-        "/start - Botni qayta ishga tushirish\n"
-        "/help - Yordam olish\n"
-        "/verse [sura]:[oyat] - Muayyan oyatni olish (masalan, /verse 1:1)\n"
-        "/surah [sura] - Suradan oyatlarni olish (masalan, /surah 1)\n"
-        "/search [so'z] - Kalit so'z bo'yicha qidirish (masalan, /search rahmat)"
+    locale = hosting.active().locale
+    bot.reply_to(message,
+        locales.text('greeting', locale, name=message.from_user.first_name) + locales.text('commands', locale)
     )
 
 @bot.message_handler(commands=['help'])
 def help_command(message):
     """Handle the /help command"""
-    bot.reply_to(message,
-        "Qurʼon botidan foydalanish uchun quyidagi buyruqlardan foydalaning:\n\n"
-        "/start - Botni qayta ishga tushirish\n"
-        "/help - Yordam olish\n"
-        "/verse [sura]:[oyat] - Muayyan oyatni olish (masalan, /verse 1:1)\n"
-        "/surah [sura] - Suradan oyatlarni olish (masalan, /surah 1)\n"
-        "/search [so'z] - Kalit so'z bo'yicha qidirish (masalan, /search rahmat)"
-    )
+    locale = hosting.active().locale
+    bot.reply_to(message, locales.text('help', locale) + locales.text('commands', locale))
+
+def user_language(user_id):
+    """Return the translation chosen by a user, or the default of the active bot"""
+    return user_languages.get(user_id, hosting.active().language)
+
+def search_verses(query, user_id):
+    """Search the local index when available, otherwise the remote API"""
+    try:
+        # The most relevant verses first, see SearchEngine.top
+        results = get_search_engine().top(query, user_language(user_id))
+    except QuerySyntaxError as e:
+        return {'success': False, 'message': str(e)}
+    if results is None:
+        # Keyed by the normalized terms, so "Rahmat" and "rahmat!" share one cached response
+        return remote_searches.get(query_key(query) or query)
+    return {'success': True, 'results': results}
+
+def is_hopeless_search(query, user_id):
+    """Check the vocabulary filter, but only for searches that run against the local index"""
+    if get_search_engine().index(user_language(user_id)) is None:
+        return False
+    return is_hopeless(query)
+
+def no_results_text(query, user_id):
+    """Build the "no results" reply with "did you mean" suggestions"""
+    text = ui_text('no_results', query=query)
+    suggestions = did_you_mean(query, user_language(user_id))
+    if suggestions:
+        text += ui_text('did_you_mean') + ", ".join(f"/search {word}" for word in suggestions)
+    return text
+
+def reply_no_results(message, query):
+    """Answer instantly when no query term occurs anywhere in the corpus"""
+    metrics.incr('search.hopeless')
+    bot.reply_to(message, no_results_text(query, message.from_user.id), parse_mode='Markdown')
+
+def reply_with_search(message, query):
+    """Search and show the results by editing the progress message in place"""
+    if is_hopeless_search(query, message.from_user.id):
+        reply_no_results(message, query)
+        return
+    
+    # Indicate search is in progress
+    progress_message = bot.reply_to(message, ui_text('searching', query=query), parse_mode='Markdown')
+    
+    # Perform search
+    search_results = search_verses(query, message.from_user.id)
+    if not search_results.get('success', False):
+        text = ui_text('error', message=search_results.get('message', ui_text('unknown_error')))
+        bot.edit_message_text(text, message.chat.id, progress_message.message_id)
+        return
+    
+    # Replace the progress message with the results
+    results = search_results.get('results', [])
+    if not results:
+        text = no_results_text(query, message.from_user.id)
+    else:
+        text = format_search_results(results)
+        if query_key(query):
+            popularity.record(QUERY, query_key(query))
+    bot.edit_message_text(text, message.chat.id, progress_message.message_id, parse_mode='Markdown')
+
+def send_verses(message, verses):
+    """Send formatted verses packed into as few messages as possible"""
+    for text in pack_messages([format_verse_message(verse) for verse in verses]):
+        bot.reply_to(message, text, parse_mode='Markdown')
 
 @bot.message_handler(commands=['verse'])
 def verse_command(message):
-    """Handle the /verse command to retrieve a specific verse"""
-    command_parts = message.text.split()
+    """Handle the /verse command to retrieve one or more verses"""
+    command_parts = message.text.split(maxsplit=1)
     
     if len(command_parts) < 2:
-        bot.reply_to(message, "Iltimos, surah va oyat raqamini kiriting. Masalan: /verse 1:1")
+        bot.reply_to(message, ui_text('verse_usage', command='verse', example='1:1'))
         return
     
-    verse_ref = command_parts[1]
-    surah, ayah = parse_verse_command(verse_ref)
+    references = parse_verse_references(command_parts[1])
     
-    if not surah or not ayah:
-        bot.reply_to(message, "Noto'g'ri format. Iltimos, surah:oyat shaklida kiriting (masalan, 1:1)")
+    if not references:
+        bot.reply_to(message, ui_text('verse_format', example='1:1, 2:255-257, 1:1,112:1'))
         return
     
-    # Get verse data
-    verse_data = quran_api.get_verse(surah, ayah)
-    if not verse_data.get('success', False):
-        bot.reply_to(message, f"Xato: {verse_data.get('message', 'Nomalum xato')}")
-        return
+    # Serve every reference from the local corpus in one batch when it is available
+    language = user_language(message.from_user.id)
+    verses = get_corpus().get_verses(references, language)
+    if verses is None:
+        # The remote API serves one verse per call, so long ranges are refused
+        if sum(last - first + 1 for _surah, first, last in references) > MAX_REMOTE_VERSES:
+            bot.reply_to(message, ui_text('remote_limit', limit=MAX_REMOTE_VERSES))
+            return
+        verses = []
+        for surah, first, last in references:
+            for ayah in range(first, last + 1):
+                verse_data = remote_verses.get(surah, ayah)
+                if not verse_data.get('success', False):
+                    bot.reply_to(message, ui_text('error', message=verse_data.get('message', ui_text('unknown_error'))))
+                    return
+                verses.append(verse_data.get('verse', {}))
+        # Sequential readers ask for the next verses right after these
+        last_surah, _first, last_ayah = references[-1]
+        prefetch_after(last_surah, last_ayah)
+    
+    for surah, first, last in references:
+        for ayah in range(first, last + 1):
+            popularity.record(VERSE, f"{surah}:{ayah}")
+    popularity.record(LANGUAGE, language)
     
-    # Format and send verse
-    formatted_verse = format_verse_message(verse_data.get('verse', {}))
-    bot.reply_to(message, formatted_verse, parse_mode='Markdown')
+    send_verses(message, verses)
+
+def prefetch_after(surah, ayah):
+    """Fetch the PREFETCH_AHEAD verses after surah:ayah into the remote cache"""
+    index = verse_index(surah, ayah)
+    for next_index in range(index + 1, min(index + 1 + PREFETCH_AHEAD, TOTAL_VERSES)):
+        key = verse_ref(next_index)
+        if key not in remote_verses:
+            prefetcher.submit(remote_verses.get, *key)
 
 @bot.message_handler(commands=['surah'])
 def surah_command(message):
@@ -86,88 +316,347 @@ def surah_command(message):
     command_parts = message.text.split()
     
     if len(command_parts) < 2:
-        bot.reply_to(message, "Iltimos, surah raqamini kiriting. Masalan: /surah 1")
+        bot.reply_to(message, ui_text('surah_usage'))
         return
     
-    try:
-        surah = int(command_parts[1])
-        if surah < 1 or surah > 114:
-            bot.reply_to(message, "Surah raqami 1 dan 114 gacha bo'lishi kerak.")
-            return
-    except ValueError:
-        bot.reply_to(message, "Noto'g'ri format. Iltimos, surah raqamini kiriting (masalan, 1)")
+    # Accepts a number or a name such as "Yasin" or "Al-Baqarah"
+    surah_info = find_surah(' '.join(command_parts[1:]))
+    if surah_info is None:
+        bot.reply_to(message, ui_text('surah_not_found'))
         return
+    surah = surah_info.number
     
     # Get first 3 verses from the surah
-    bot.reply_to(message, f"🔍 *Surah {surah}* dan dastlabki oyatlar...", parse_mode='Markdown')
+    bot.reply_to(message,
+        ui_text('surah_header', number=surah, name=surah_info.name_simple,
+                name_arabic=surah_info.name_arabic, verses=surah_info.verses_count),
+        parse_mode='Markdown'
+    )
     
-    for ayah in range(1, 4):  # Get first 3 verses
-        verse_data = quran_api.get_verse(surah, ayah)
+    for ayah in range(1, min(3, surah_info.verses_count) + 1):  # Get first 3 verses
+        verse_data = remote_verses.get(surah, ayah)
         if not verse_data.get('success', False):
             if ayah == 1:  # If even the first verse fails
-                bot.reply_to(message, f"Xato: {verse_data.get('message', 'Nomalum xato')}")
+                bot.reply_to(message, ui_text('error', message=verse_data.get('message', ui_text('unknown_error'))))
             break
         
         # Format and send verse
         formatted_verse = format_verse_message(verse_data.get('verse', {}))
         bot.send_message(message.chat.id, formatted_verse, parse_mode='Markdown')
 
+# Verses sent per /juz or /page reply, a few packed messages; the rest follows on request
+VERSES_PER_PART = 15
+
+def division_header(name, number, verses):
+    """Describe a juz or page with its verse range and the other division it falls in"""
+    header = ui_text('division_header', label=ui_text(name), number=number,
+                     first=verses[0].verse_key, last=verses[-1].verse_key, verses=len(verses))
+    first, last = verses[0].index, verses[-1].index
+    if name == JUZ:
+        pages = get_division(PAGE)
+        if pages is not None:
+            header += ui_text('division_pages', first=pages.part_of(first), last=pages.part_of(last))
+    else:
+        header += ui_text('division_juz', juz=get_division(JUZ).part_of(first))
+    return header
+
+def send_division(message, name):
+    """Send one juz or mushaf page from the local corpus, VERSES_PER_PART verses at a time"""
+    label = ui_text(name)
+    command_parts = message.text.split()
+    if len(command_parts) < 2:
+        bot.reply_to(message, ui_text('division_usage', command=name))
+        return
+    
+    division = get_division(name)
+    if division is None:
+        bot.reply_to(message, ui_text('division_missing', label=label))
+        return
+    
+    # A number, or a verse whose juz or page is wanted
+    argument = command_parts[1]
+    number = None
+    if ':' in argument:
+        surah, ayah = parse_verse_command(argument)
+        if surah:
+            number = division.part_of(verse_index(surah, ayah))
+    elif argument.isdigit():
+        number = int(argument)
+    references = division.references(number) if number else None
+    if references is None:
+        bot.reply_to(message, ui_text('division_number', count=len(division)))
+        return
+    
+    # One batched lookup for the whole range, no network calls; records decode their text only when formatted
+    verses = get_corpus().get_verses(references, user_language(message.from_user.id))
+    if verses is None:
+        bot.reply_to(message, ui_text('no_corpus'))
+        return
+    
+    part_count = -(-len(verses) // VERSES_PER_PART)
+    part = int(command_parts[2]) if len(command_parts) > 2 and command_parts[2].isdigit() else 1
+    if not 1 <= part <= part_count:
+        bot.reply_to(message, ui_text('division_parts', label=label.lower(), count=part_count))
+        return
+    
+    header = division_header(name, number, verses)
+    if part_count > 1:
+        header += ui_text('division_part', part=part, count=part_count)
+    bot.reply_to(message, header, parse_mode='Markdown')
+    # Only the requested part is formatted
+    part_verses = verses[(part - 1) * VERSES_PER_PART:part * VERSES_PER_PART]
+    for text in pack_messages([format_verse_message(verse) for verse in part_verses]):
+        bot.reply_to(message, text, parse_mode='Markdown')
+    if part < part_count:
+        bot.reply_to(message, ui_text('division_more', command=name, number=number, part=part + 1))
+
+@bot.message_handler(commands=['juz'])
+def juz_command(message):
+    """Handle the /juz command to read a whole juz"""
+    send_division(message, JUZ)
+
+@bot.message_handler(commands=['page'])
+def page_command(message):
+    """Handle the /page command to read one mushaf page"""
+    send_division(message, PAGE)
+
 @bot.message_handler(commands=['search'])
 def search_command(message):
     """Handle the /search command to search for verses by keyword"""
     command_parts = message.text.split()
     
     if len(command_parts) < 2:
-        bot.reply_to(message, "Iltimos, qidiruv so'zini kiriting. Masalan: /search rahmat")
+        bot.reply_to(message, ui_text('search_usage'))
         return
     
     query = ' '.join(command_parts[1:])
     
-    # Indicate search is in progress
-    progress_message = bot.reply_to(message, f"🔍 *{query}* so'zi bo'yicha qidirilmoqda...", parse_mode='Markdown')
+    reply_with_search(message, query)
+
+@bot.message_handler(commands=['similar'])
+def similar_command(message):
+    """Handle the /similar command to find verses related to a verse"""
+    command_parts = message.text.split()
     
-    # Perform search
-    search_results = quran_api.search_verses(query)
-    if not search_results.get('success', False):
-        bot.reply_to(message, f"Xato: {search_results.get('message', 'Nomalum xato')}")
+    if len(command_parts) < 2:
+        bot.reply_to(message, ui_text('verse_usage', command='similar', example='2:255'))
         return
     
-    # Format and send results
-    results = search_results.get('results', [])
-    if not results:
-        bot.reply_to(message, f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
+    surah, ayah = parse_verse_command(command_parts[1])
+    
+    if not surah or not ayah:
+        bot.reply_to(message, ui_text('verse_format', example='2:255'))
+        return
+    
+    results = similar_verses(surah, ayah, user_language(message.from_user.id))
+    if results is None:
+        bot.reply_to(message, ui_text('similar_unavailable'))
         return
     
     formatted_results = format_search_results(results)
-    bot.reply_to(message, formatted_results, parse_mode='Markdown')
+    bot.reply_to(message, ui_text('similar_header', verse=f"{surah}:{ayah}") + formatted_results, parse_mode='Markdown')
 
-@bot.message_handler(func=lambda message: True)
-def echo(message):
-    """Handle all other messages as search queries"""
-    query = message.text.strip()
-    if not query:
+@bot.message_handler(commands=['stats'])
+def stats_command(message):
+    """Handle the /stats command to show how often a word occurs"""
+    command_parts = message.text.split()
+    
+    if len(command_parts) < 2:
+        bot.reply_to(message, ui_text('stats_usage'))
         return
     
-    # Indicate search is in progress
-    progress_message = bot.reply_to(message, f"🔍 *{query}* so'zi bo'yicha qidirilmoqda...", parse_mode='Markdown')
+    terms = tokenize(command_parts[1])
+    if len(terms) != 1:
+        bot.reply_to(message, ui_text('stats_one_word'))
+        return
     
-    # Perform search
-    search_results = quran_api.search_verses(query)
-    if not search_results.get('success', False):
-        bot.reply_to(message, f"Xato: {search_results.get('message', 'Nomalum xato')}")
+    stats = word_stats(terms[0], user_language(message.from_user.id))
+    if stats is None:
+        bot.reply_to(message, no_results_text(terms[0], message.from_user.id), parse_mode='Markdown')
         return
     
-    # Format and send results
-    results = search_results.get('results', [])
-    if not results:
-        bot.reply_to(message, f"*{query}* so'zi bo'yicha hech qanday natija topilmadi.", parse_mode='Markdown')
+    bot.reply_to(message, format_word_stats({
+        'word': terms[0],
+        'total': stats.total,
+        'verses': stats.verses,
+        'per_surah': stats.per_surah(),
+    }, locale=hosting.active().locale), parse_mode='Markdown')
+
+@bot.message_handler(commands=['lang'])
+def lang_command(message):
+    """Handle the /lang command to choose the translation language"""
+    command_parts = message.text.split()
+    languages = get_corpus().store.languages()
+    
+    if len(command_parts) < 2:
+        current = user_language(message.from_user.id)
+        bot.reply_to(message, ui_text('lang_current', language=current, languages=', '.join(languages) or '-'))
         return
     
-    formatted_results = format_search_results(results)
-    bot.reply_to(message, formatted_results, parse_mode='Markdown')
+    language = command_parts[1].lower()
+    if language not in languages:
+        bot.reply_to(message, ui_text('lang_missing', languages=', '.join(languages) or '-'))
+        return
+    
+    user_languages.set(message.from_user.id, language)
+    bot.reply_to(message, ui_text('lang_changed', language=language))
+
+@bot.message_handler(commands=['audio'])
+def audio_command(message):
+    """Handle the /audio command to send the recitation of a verse"""
+    command_parts = message.text.split()
+    
+    if len(command_parts) < 2:
+        bot.reply_to(message, ui_text('verse_usage', command='audio', example='1:1'))
+        return
+    
+    surah, ayah = parse_verse_command(command_parts[1])
+    
+    if not surah or not ayah:
+        bot.reply_to(message, ui_text('verse_format', example='1:1'))
+        return
+    
+    # Reuses the cached file_id, uploads the local clip only on the first request
+    bot.send_chat_action(message.chat.id, 'upload_audio')
+    sent = hosting.active().audio_cache.send_audio(bot, message.chat.id, surah, ayah,
+                                  reply_to_message_id=message.message_id)
+    if not sent:
+        bot.reply_to(message, ui_text('audio_missing', verse=f"{surah}:{ayah}"))
+
+@bot.inline_handler(func=lambda query: True)
+def inline_query(inline_query):
+    """Offer completions of the last word typed in inline mode"""
+    text = inline_query.query.strip()
+    language = user_language(inline_query.from_user.id)
+    completer = get_autocompleter(language)
+    if not text or completer is None:
+        bot.answer_inline_query(inline_query.id, [], cache_time=60)
+        return
+    if not inline_throttle.allow(inline_query.from_user.id):
+        # Not cached, so the next keystroke after the bucket refills gets results
+        bot.answer_inline_query(inline_query.id, [], cache_time=0, is_personal=True)
+        return
+    
+    head, _, last_word = text.rpartition(' ')
+    prefix = ''.join(tokenize(last_word))
+    results = []
+    for term, frequency in completer.complete(prefix, 5):
+        completed = f"{head} {term}".strip()
+        try:
+            verses = get_search_engine().top(completed, language, 3) or []
+        except QuerySyntaxError:
+            continue
+        results.append(types.InlineQueryResultArticle(
+            id=str(len(results)),
+            title=completed,
+            description=ui_text('inline_frequency', count=frequency),
+            input_message_content=types.InputTextMessageContent(
+                format_search_results(verses), parse_mode='Markdown'
+            )
+        ))
+    # Results follow the user's /lang choice, so Telegram must not share them between users
+    bot.answer_inline_query(inline_query.id, results, cache_time=300, is_personal=True)
+
+@bot.message_handler(commands=['botstats'])
+def botstats_command(message):
+    """Handle the /botstats admin command to show runtime counters"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    bot.reply_to(message, metrics.format_stats(hosting.active().locale))
+
+@bot.message_handler(commands=['memory'])
+def memory_command(message):
+    """Handle the /memory admin command to show memory used by the corpus, indexes and caches"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    bot.reply_to(message, memory.format_report(hosting.active().locale))
+
+@bot.message_handler(commands=['reload'])
+def reload_command(message):
+    """Handle the /reload admin command to swap in a freshly ingested corpus"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    bot.reply_to(message, ui_text('reload_started', version=snapshot.current().version))
+    
+    def on_done(new_snapshot, error):
+        if error:
+            bot.reply_to(message, ui_text('reload_failed', error=error))
+        else:
+            bot.reply_to(message, ui_text('reload_done', version=new_snapshot.version))
+    
+    snapshot.reload_in_background(on_done)
+
+def run_debounced_search(chat_key):
+    """Search for the latest free-text message of a chat once its window closes"""
+    message = search_throttle.flush(chat_key)
+    if message is None:
+        return
+    
+    query = message.text.strip()
+    if is_hopeless_search(query, message.from_user.id):
+        reply_no_results(message, query)
+        return
+    
+    if not search_throttle.allow(message.from_user.id):
+        bot.reply_to(message, ui_text('throttled'))
+        return
+    
+    try:
+        reply_with_search(message, query)
+    except Exception as e:
+        logger.error(f"Error in debounced search: {e}")
+
+def shed_debounced_search(chat_key):
+    """Drop the pending search of a chat that waited too long for a worker"""
+    message = search_throttle.flush(chat_key)
+    if message is not None:
+        reply_busy(message)
+
+def schedule_debounced_search(chat_key):
+    """Queue the search of a chat whose window closed behind commands and /search"""
+    admission.submit(ECHO, run_debounced_search, chat_key, on_shed=lambda: shed_debounced_search(chat_key))
+
+@bot.message_handler(func=lambda message: True)
+def echo(message):
+    """Handle all other messages as search queries"""
+    # Runs on the polling thread, so it only records the message; the search runs in an admitted job
+    if not message.text.strip():
+        return
+    
+    # Rapid messages from one chat collapse into a single search of the latest text
+    # Chats are keyed per bot, since a user's private chat has the same id in every bot
+    chat_key = (hosting.active().name, message.chat.id)
+    if search_throttle.submit(chat_key, message):
+        # The timer thread runs with this bot active
+        timer = threading.Timer(search_throttle.debounce, contextvars.copy_context().run,
+                                args=(schedule_debounced_search, chat_key))
+        timer.daemon = True
+        timer.start()
+
+def warm_up():
+    """Fill the caches for the most popular verses, queries and languages"""
+    if get_corpus().is_available():
+        warm_snapshot(popularity, DEFAULT_LANGUAGE)
+        return
+    # Without a local corpus, the remote response caches are what is cold;
+    # popular verses and searches are fetched once, one at a time, while idle
+    for key in popularity.top(VERSE, WARM_VERSES):
+        surah, ayah = parse_verse_command(key)
+        if surah and admission.pending() == 0:
+            remote_verses.get(surah, ayah)
+    for key in popularity.top(QUERY, WARM_QUERIES):
+        if admission.pending() == 0:
+            remote_searches.get(key)
+
+def start_warm_up():
+    """Warm the caches in the background so polling starts immediately"""
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
 
 if __name__ == "__main__":
     logger.info("Starting Qur'on bot using PyTelegramBotAPI")
+    snapshot.install_signal_handler()
+    start_warm_up()
     try:
         # Start the bot
         bot.infinity_polling()
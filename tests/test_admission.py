@@ -0,0 +1,71 @@
+import threading
+import time
+
+from telebot import types
+
+from admission import COMMAND, ECHO, SEARCH, AdmissionController, telebot_priority
+
+
+def blocked_controller(**kwargs):
+    """Controller whose only worker is busy until the returned event is set"""
+    controller = AdmissionController(workers=1, search_workers=1, **kwargs)
+    started, release = threading.Event(), threading.Event()
+    controller.submit(COMMAND, lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    return controller, release
+
+
+def wait_idle(controller):
+    deadline = time.monotonic() + 5
+    while controller.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+
+def test_full_queue_sheds_immediately():
+    controller, release = blocked_controller(queue_sizes=(1, 1, 1), deadlines=(10, 10, 10))
+    shed = []
+    assert controller.submit(ECHO, lambda: None, on_shed=lambda: shed.append(1))
+    assert not controller.submit(ECHO, lambda: None, on_shed=lambda: shed.append(2))
+    assert shed == [2]
+    release.set()
+
+
+def test_expired_jobs_are_shed_not_run():
+    controller, release = blocked_controller(queue_sizes=(5, 5, 5), deadlines=(10, 10, 0.05))
+    ran, shed = [], []
+    controller.submit(ECHO, ran.append, 'echo', on_shed=lambda: shed.append('echo'))
+    controller.submit(SEARCH, ran.append, 'search', on_shed=lambda: shed.append('search'))
+    time.sleep(0.2)
+    release.set()
+    wait_idle(controller)
+    assert ran == ['search']
+    assert shed == ['echo']
+
+
+def test_commands_run_before_searches():
+    controller, release = blocked_controller(queue_sizes=(5, 5, 5), deadlines=(10, 10, 10))
+    order = []
+    controller.submit(ECHO, order.append, 'echo')
+    controller.submit(SEARCH, order.append, 'search')
+    controller.submit(COMMAND, order.append, 'command')
+    release.set()
+    wait_idle(controller)
+    assert order == ['command', 'search', 'echo']
+
+
+def message(text):
+    return types.Message.de_json({
+        'message_id': 1, 'date': 0, 'text': text,
+        'chat': {'id': 1, 'type': 'private'}, 'from': {'id': 1, 'is_bot': False, 'first_name': 'A'},
+    })
+
+
+def test_telebot_priorities():
+    assert telebot_priority(message('/verse 1:1')) == COMMAND
+    assert telebot_priority(message('/search rahmat')) == SEARCH
+    assert telebot_priority(message('/Search@quran_bot rahmat')) == SEARCH
+    assert telebot_priority(message('rahmat')) == ECHO
+    inline_query = types.InlineQuery.de_json({'id': '1', 'from': {'id': 1, 'is_bot': False, 'first_name': 'A'},
+                                              'query': 'rah', 'offset': ''})
+    assert telebot_priority(inline_query) == SEARCH
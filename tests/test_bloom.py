@@ -0,0 +1,28 @@
+from bloom import BloomFilter
+
+
+def test_no_false_negatives():
+    words = [f"word{n}" for n in range(5000)]
+    bloom = BloomFilter.for_capacity(len(words), error_rate=0.01)
+    for word in words:
+        bloom.add(word)
+    assert all(word in bloom for word in words)
+
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter.for_capacity(5000, error_rate=0.01)
+    for n in range(5000):
+        bloom.add(f"word{n}")
+    false_positives = sum(f"other{n}" in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_save_and_load(tmp_path):
+    bloom = BloomFilter.for_capacity(100)
+    for word in ("rahmat", "nur", "o'g'il"):
+        bloom.add(word)
+    path = str(tmp_path / 'vocabulary.bloom')
+    bloom.save(path)
+    loaded = BloomFilter.load(path)
+    assert (loaded.size, loaded.hash_count, loaded.bits) == (bloom.size, bloom.hash_count, bloom.bits)
+    assert all(word in loaded for word in ("rahmat", "nur", "o'g'il"))
@@ -0,0 +1,61 @@
+import pytest
+
+from divisions import JUZ, JUZ_STARTS, PAGE, PART_COUNTS, Division
+from surahs import TOTAL_VERSES, verse_count, verse_index
+
+
+@pytest.fixture
+def juz():
+    return Division.from_refs(JUZ, JUZ_STARTS)
+
+
+def test_juz_table_is_valid(juz):
+    assert len(juz) == PART_COUNTS[JUZ] == 30
+
+
+def test_parts_cover_every_verse_once(juz):
+    ranges = [juz.verse_range(number) for number in range(1, len(juz) + 1)]
+    assert ranges[0].start == 0
+    assert ranges[-1].stop == TOTAL_VERSES
+    assert all(a.stop == b.start for a, b in zip(ranges, ranges[1:]))
+    assert juz.verse_range(0) is None
+    assert juz.verse_range(31) is None
+
+
+def test_part_of(juz):
+    assert juz.part_of(0) == 1
+    assert juz.part_of(verse_index(2, 141)) == 1
+    assert juz.part_of(verse_index(2, 142)) == 2
+    assert juz.part_of(verse_index(114, 6)) == 30
+    for number in (1, 15, 30):
+        verses = juz.verse_range(number)
+        assert juz.part_of(verses.start) == juz.part_of(verses.stop - 1) == number
+
+
+def test_references_stay_inside_surahs(juz):
+    assert juz.references(1) == [(1, 1, 7), (2, 1, 141)]
+    last = juz.references(30)
+    assert last[0] == (78, 1, verse_count(78))
+    assert last[-1] == (114, 1, 6)
+    assert sum(l - f + 1 for _, f, l in last) == len(juz.verse_range(30))
+    assert juz.references(31) is None
+
+
+def test_from_refs_accepts_strings(juz):
+    assert Division.from_refs(JUZ, [f"{s}:{a}" for s, a in JUZ_STARTS]).starts == juz.starts
+
+
+@pytest.mark.parametrize('refs', [
+    JUZ_STARTS[:-1],
+    ((1, 2),) + JUZ_STARTS[1:],
+    JUZ_STARTS[:1] + ((2, 300),) + JUZ_STARTS[2:],
+    JUZ_STARTS[:1] + JUZ_STARTS[2:3] + JUZ_STARTS[1:2] + JUZ_STARTS[3:],
+])
+def test_from_refs_rejects_bad_tables(refs):
+    with pytest.raises(ValueError):
+        Division.from_refs(JUZ, refs)
+
+
+def test_page_needs_604_starts():
+    with pytest.raises(ValueError):
+        Division.from_refs(PAGE, JUZ_STARTS)
@@ -0,0 +1,132 @@
+import math
+import random
+
+import pytest
+
+from corpus import TextColumn
+from ingest import write_column
+from search_index import (
+    PositionalIndex, QuerySyntaxError, _gallop, intersect, iter_matches, matches, parse_query, query_terms,
+    tokenize, top_matches,
+)
+from surahs import SURAH_COUNT, TOTAL_VERSES, verse_count
+
+
+def test_gallop_finds_first_not_smaller():
+    docs = [1, 3, 5, 7, 9, 11, 13]
+    for low in range(len(docs)):
+        for target in range(15):
+            expected = next((i for i in range(low, len(docs)) if docs[i] >= target), len(docs))
+            assert _gallop(docs, target, low) == expected
+
+
+def test_intersect_matches_sets():
+    generator = random.Random(7)
+    for _ in range(200):
+        lists = [sorted(generator.sample(range(300), generator.randint(0, 80))) for _ in range(generator.randint(1, 4))]
+        expected = sorted(set.intersection(*map(set, lists)))
+        assert intersect(lists) == expected
+
+
+def test_intersect_edge_cases():
+    assert intersect([]) == []
+    assert intersect([[1, 2, 3]]) == [1, 2, 3]
+    assert intersect([[1, 2], []]) == []
+
+
+def test_parse_terms_and_operators():
+    assert parse_query("rahmat") == ('term', 'rahmat')
+    assert parse_query("rahmat nur") == ('and', [('term', 'rahmat'), ('term', 'nur')])
+    assert parse_query("rahmat AND nur") == ('and', [('term', 'rahmat'), ('term', 'nur')])
+    assert parse_query("rahmat OR nur") == ('or', [('term', 'rahmat'), ('term', 'nur')])
+    assert parse_query("Rahmat -azob") == ('and', [('term', 'rahmat'), ('not', ('term', 'azob'))])
+    assert parse_query("NOT azob") == ('not', ('term', 'azob'))
+
+
+def test_parse_phrase_near_and_groups():
+    assert parse_query('"rahmat va nur"') == ('phrase', ['rahmat', 'va', 'nur'])
+    assert parse_query("rahmat NEAR/3 nur") == ('near', 'rahmat', 'nur', 3)
+    assert parse_query("(rahmat OR nur) jannat") == (
+        'and', [('or', [('term', 'rahmat'), ('term', 'nur')]), ('term', 'jannat')])
+
+
+def test_parse_unifies_apostrophes():
+    assert parse_query("o‘g‘il") == parse_query("o'g'il") == ('term', "o'g'il")
+
+
+@pytest.mark.parametrize('query', ["", "()", "(rahmat", "rahmat)", '""', "NOT", "rahmat NEAR/2", "!!!"])
+def test_parse_errors(query):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(query)
+
+
+WORDS = ['rahmat', 'nur', 'jannat', 'azob', 'sabr', 'ilm', 'haq', 'kitob', 'daryo', 'zikr', "o'g'il", 'va']
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    """Index of a generated column where word frequencies follow a steep curve"""
+    generator = random.Random(30)
+    weights = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+    def records():
+        for surah in range(1, SURAH_COUNT + 1):
+            for ayah in range(1, verse_count(surah) + 1):
+                yield surah, ayah, ' '.join(generator.choices(WORDS, weights, k=generator.randint(3, 12)))
+
+    path = str(tmp_path_factory.mktemp('text') / 'uz.txt')
+    write_column(records(), path)
+    return PositionalIndex(TextColumn.from_file('uz', path))
+
+
+def brute_matches(tokens, tree):
+    kind = tree[0]
+    if kind == 'term':
+        return tree[1] in tokens
+    if kind == 'phrase':
+        size = len(tree[1])
+        return any(tokens[i:i + size] == tree[1] for i in range(len(tokens)))
+    if kind == 'near':
+        left = [i for i, token in enumerate(tokens) if token == tree[1]]
+        right = [i for i, token in enumerate(tokens) if token == tree[2]]
+        return any(abs(a - b) <= tree[3] for a in left for b in right)
+    if kind == 'not':
+        return not brute_matches(tokens, tree[1])
+    if kind == 'or':
+        return any(brute_matches(tokens, node) for node in tree[1])
+    return all(brute_matches(tokens, node) for node in tree[1])
+
+
+def brute_top(index, tree, limit):
+    verses = [tokenize(index.column.text(doc)) for doc in range(len(index.column))]
+    terms = list(dict.fromkeys(query_terms(tree)))
+    document_frequency = {term: sum(term in tokens for tokens in verses) for term in terms}
+    ranked = []
+    for doc, tokens in enumerate(verses):
+        if not brute_matches(tokens, tree):
+            continue
+        score = 0.0
+        for term in terms:
+            if tokens.count(term):
+                score += (1 + math.log(tokens.count(term))) * math.log(TOTAL_VERSES / document_frequency[term])
+        ranked.append((-score, doc))
+    return [doc for _, doc in sorted(ranked)[:limit]]
+
+
+@pytest.mark.parametrize('query', [
+    "rahmat", "va", "azob", "rahmat nur", "rahmat va", "daryo OR zikr", '"rahmat nur"', '"va va"',
+    "rahmat NEAR/1 daryo", "sabr -va", "NOT va", "va OR NOT nur", "(kitob OR daryo) -rahmat",
+    "o'g'il zikr", "kalima", "rahmat kalima",
+])
+@pytest.mark.parametrize('limit', [1, 10, 50])
+def test_top_matches_brute_force(index, query, limit):
+    tree = parse_query(query)
+    assert top_matches(index, tree, limit) == brute_top(index, tree, limit)
+
+
+def test_matches_agree_with_brute_force(index):
+    for query in ('"rahmat nur"', "haq NEAR/2 ilm", "(kitob OR daryo) -rahmat", "NOT va"):
+        tree = parse_query(query)
+        expected = [doc for doc in range(TOTAL_VERSES) if brute_matches(tokenize(index.column.text(doc)), tree)]
+        assert list(iter_matches(index, tree)) == expected
+        assert [doc for doc in range(TOTAL_VERSES) if matches(index, tree, doc)] == expected
@@ -0,0 +1,41 @@
+import json
+
+from update_tracker import UpdateTracker
+
+
+def test_duplicates_are_rejected(tmp_path):
+    tracker = UpdateTracker(str(tmp_path / 'state.json'), window=10)
+    assert tracker.accept(5)
+    assert not tracker.accept(5)
+    assert tracker.accept(3)
+    assert not tracker.accept(3)
+
+
+def test_ids_older_than_the_window_are_rejected(tmp_path):
+    tracker = UpdateTracker(str(tmp_path / 'state.json'), window=10)
+    assert tracker.accept(100)
+    assert not tracker.accept(90)
+    assert tracker.accept(91)
+
+
+def test_durable_accept_writes_before_returning(tmp_path):
+    path = tmp_path / 'state.json'
+    tracker = UpdateTracker(str(path), window=10)
+    tracker.accept(1)
+    tracker.flush()
+    assert tracker.accept(2, durable=True)
+    assert json.loads(path.read_text()) == {'last_update_id': 2, 'recent': [1, 2]}
+
+
+def test_state_survives_restart(tmp_path):
+    path = str(tmp_path / 'state.json')
+    tracker = UpdateTracker(path, window=10)
+    for update_id in (1, 2, 3):
+        tracker.accept(update_id)
+    tracker.flush()
+
+    restarted = UpdateTracker(path, window=10)
+    assert restarted.last_update_id == 3
+    assert not restarted.accept(2)
+    assert restarted.accept(4)
+    restarted.flush()
@@ -0,0 +1,55 @@
+from surahs import verse_count
+from utils import MAX_REFERENCE_VERSES, pack_messages, parse_verse_references, split_lines
+
+
+def test_single_verse():
+    assert parse_verse_references("2:255") == [(2, 255, 255)]
+
+
+def test_range_and_list():
+    assert parse_verse_references("1:1, 2:255-257") == [(1, 1, 1), (2, 255, 257)]
+
+
+def test_whole_surah():
+    assert parse_verse_references("112") == [(112, 1, verse_count(112))]
+
+
+def test_invalid_references():
+    for text in ("", "0:1", "115", "1:8", "2:257-255", "a:b", "1:1-", ","):
+        assert parse_verse_references(text) is None, text
+
+
+def test_reference_limit():
+    # 286 + 7 verses, then the rest from surah 3
+    rest = MAX_REFERENCE_VERSES - verse_count(2) - verse_count(1)
+    assert parse_verse_references(f"2,1,3:1-{rest}") is not None
+    assert parse_verse_references(f"2,1,3:1-{rest + 1}") is None
+
+
+def test_pack_keeps_order_and_limit():
+    parts = [f"*{n}:1*\n" + "x" * 30 for n in range(1, 11)]
+    messages = pack_messages(parts, limit=100)
+    assert all(len(message) <= 100 for message in messages)
+    assert "\n\n".join(messages) == "\n\n".join(parts)
+    assert len(messages) < len(parts)
+
+
+def test_pack_splits_oversized_part_at_lines():
+    lines = [f"*{n}:1* " + "y" * 40 for n in range(1, 21)]
+    messages = pack_messages(["short", "\n".join(lines), "tail"], limit=120)
+    assert messages[0] == "short"
+    assert all(len(message) <= 120 for message in messages)
+    # No line of the oversized part is cut
+    body = [line for message in messages[1:] for line in message.split("\n") if line and line != "tail"]
+    assert body == lines
+
+
+def test_split_long_line_at_spaces():
+    text = " ".join(["word"] * 50)
+    chunks = split_lines(text, limit=32)
+    assert all(len(chunk) <= 32 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_line_without_spaces():
+    assert split_lines("z" * 25, limit=10) == ["z" * 10, "z" * 10, "z" * 5]
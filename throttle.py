@@ -0,0 +1,123 @@
+"""
+Per-user throttling and per-chat debouncing of free-text searches.
+
+A free-text message opens a debounce window for its chat. Messages arriving
+while the window is open only replace the pending text, and when the window
+closes a single search runs for the latest one. Every search then takes a
+token from the user's bucket, so a user cannot run more than SEARCH_BURST
+searches at once or SEARCH_RATE searches per second on average.
+"""
+import os
+import threading
+import time
+
+import metrics
+
+SEARCH_RATE = float(os.environ.get('SEARCH_RATE', '0.5'))
+SEARCH_BURST = float(os.environ.get('SEARCH_BURST', '3'))
+SEARCH_DEBOUNCE = float(os.environ.get('SEARCH_DEBOUNCE', '1.0'))
+
+# Buckets are pruned once this many users are tracked
+MAX_TRACKED_USERS = 10000
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at a fixed rate"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now=None):
+        """Take one token, returning False if the bucket is empty"""
+        self.refill(time.monotonic() if now is None else now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class SearchThrottle:
+    """Token buckets per user plus a debounce window per chat"""
+
+    def __init__(self, rate=SEARCH_RATE, burst=SEARCH_BURST, debounce=SEARCH_DEBOUNCE, name='search'):
+        # Prefix of the metrics of this throttle, e.g. "search.throttled"
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.debounce = debounce
+        self._buckets = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def allow(self, user_id):
+        """
+        Take a search token for a user
+
+        Args:
+            user_id (int): Telegram user id
+
+        Returns:
+            bool: True if the search may run
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(user_id)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_USERS:
+                    self._prune(now)
+                bucket = self._buckets[user_id] = TokenBucket(self.rate, self.burst)
+            allowed = bucket.take(now)
+
+        metrics.incr(f"{self.name}.allowed" if allowed else f"{self.name}.throttled")
+        return allowed
+
+    def _prune(self, now):
+        # Full buckets carry no state worth keeping
+        for user_id, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[user_id]
+
+    def submit(self, chat_id, payload):
+        """
+        Record the latest free-text message of a chat
+
+        Args:
+            chat_id: Telegram chat id, or any hashable key of a chat
+            payload: Message (or update) to search for when the window closes
+
+        Returns:
+            bool: True if a new window was opened and the caller must call
+                flush(chat_id) after self.debounce seconds; False if the
+                message was merged into an already pending search
+        """
+        with self._lock:
+            opened = chat_id not in self._pending
+            self._pending[chat_id] = payload
+
+        metrics.incr(f"{self.name}.submitted" if opened else f"{self.name}.debounced")
+        return opened
+
+    def flush(self, chat_id):
+        """
+        Close the debounce window of a chat
+
+        Args:
+            chat_id: Telegram chat id, or any hashable key of a chat
+
+        Returns:
+            The latest payload submitted for the chat, or None
+        """
+        with self._lock:
+            return self._pending.pop(chat_id, None)
+
+    def tracked_users(self):
+        """Return the number of users with a token bucket"""
+        return len(self._buckets)
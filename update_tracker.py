@@ -0,0 +1,120 @@
+"""
+Durable update offset and replay protection.
+
+The highest handled update_id and a window of recently seen ids are saved to
+UPDATE_STATE_FILE. On start the polling offset resumes after the saved id, and
+every incoming update passes accept() before any handler runs, so updates
+fetched again after a crash or redeploy are dropped instead of being answered
+twice.
+
+That guarantee only holds for updates written to disk before their handler
+runs: accept(update_id, durable=True), or accept() for a batch followed by
+one flush(), fsyncs the state first. Updates accepted without that are
+written by the background flush within UPDATE_FLUSH_INTERVAL, and a crash
+inside that interval may replay them. A durably recorded update whose
+handler was cut short by a crash is not retried.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import flusher
+import metrics
+
+logger = logging.getLogger(__name__)
+
+UPDATE_STATE_FILE = os.environ.get('UPDATE_STATE_FILE', 'update_state.json')
+UPDATE_DEDUP_WINDOW = int(os.environ.get('UPDATE_DEDUP_WINDOW', '1000'))
+
+# The state is written at most this often and at least this often while it changes
+UPDATE_FLUSH_INTERVAL = float(os.environ.get('UPDATE_FLUSH_INTERVAL', '1.0'))
+
+class UpdateTracker:
+    """Remembers which updates were already handled, across restarts"""
+
+    def __init__(self, path=UPDATE_STATE_FILE, window=UPDATE_DEDUP_WINDOW):
+        self.path = path
+        self.last_update_id = 0
+        self._recent = deque(maxlen=window)
+        self._recent_ids = set()
+        self._dirty = False
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load()
+        # Also covers the tail of a burst when no further call triggers a write
+        flusher.register(self.flush, UPDATE_FLUSH_INTERVAL)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read update state {self.path}: {e}")
+            return
+        self.last_update_id = state.get('last_update_id', 0)
+        for update_id in state.get('recent', []):
+            self._remember(update_id)
+
+    def _remember(self, update_id):
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_ids.discard(self._recent[0])
+        self._recent.append(update_id)
+        self._recent_ids.add(update_id)
+
+    def accept(self, update_id, durable=False):
+        """
+        Record an incoming update
+
+        Args:
+            update_id (int): Telegram update_id
+            durable (bool): Write the state to disk before returning, for
+                updates whose handlers must never run twice
+
+        Returns:
+            bool: True if the update is new and should be handled, False
+                if it was already seen
+        """
+        with self._lock:
+            if update_id in self._recent_ids or update_id <= self.last_update_id - self._recent.maxlen:
+                duplicate = True
+            else:
+                duplicate = False
+                self._remember(update_id)
+                self.last_update_id = max(self.last_update_id, update_id)
+                self._dirty = True
+            due = self._dirty and time.monotonic() - self._flushed_at >= UPDATE_FLUSH_INTERVAL
+
+        if duplicate:
+            metrics.incr('updates.duplicate')
+            return False
+        metrics.incr('updates.accepted')
+        if due or durable:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write the state to disk if it changed"""
+        # Serializes writers so an older state never replaces a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                state = {'last_update_id': self.last_update_id, 'recent': list(self._recent)}
+                self._dirty = False
+                self._flushed_at = time.monotonic()
+
+            tmp_path = self.path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Could not save update state {self.path}: {e}")
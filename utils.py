@@ -1,3 +1,15 @@
+import locales
+from surahs import SURAH_COUNT, get_surah, verse_count
+
+# Telegram rejects messages longer than this many characters
+MESSAGE_LIMIT = 4096
+
+# Upper bound on verses returned for one multi-reference request
+MAX_REFERENCE_VERSES = 300
+
+# Upper bound when the verses come one request at a time from the remote API
+MAX_REMOTE_VERSES = 10
+
 def format_verse_message(verse_data):
     """
     Format verse data for Telegram message
@@ -90,6 +102,44 @@ def format_surah_info(surah_data):
     
     return message
 
+def format_word_stats(stats_data, limit=10, bar_width=12, locale=locales.DEFAULT_LOCALE):
+    """
+    Format word statistics as a histogram for Telegram message
+    
+    Args:
+        stats_data (dict): 'word', 'total', 'verses' and 'per_surah'
+            ((surah, count) pairs, most occurrences first)
+        limit (int): Number of surahs shown in the histogram
+        bar_width (int): Length of the longest bar
+        locale (str): Locale of the labels
+        
+    Returns:
+        str: Formatted message with word statistics
+    """
+    word = stats_data.get('word', '')
+    per_surah = stats_data.get('per_surah', [])
+    
+    message = f"📊 *{word}*\n\n"
+    message += locales.text('stats_total', locale, count=stats_data.get('total', 0))
+    message += locales.text('stats_verses', locale, count=stats_data.get('verses', 0))
+    message += locales.text('stats_surahs', locale, count=len(per_surah))
+    
+    if not per_surah:
+        return message
+    
+    # Monospace block keeps the bars aligned
+    top_count = per_surah[0][1]
+    lines = []
+    for surah, count in per_surah[:limit]:
+        bar = '█' * max(1, round(count / top_count * bar_width))
+        lines.append(f"{surah:>3} {get_surah(surah).name_simple[:14]:<14} {bar} {count}")
+    message += "```\n" + "\n".join(lines) + "\n```"
+    
+    if len(per_surah) > limit:
+        message += locales.text('stats_more', locale, count=len(per_surah) - limit)
+    
+    return message
+
 def parse_verse_command(command_text):
     """
     Parse verse command to extract surah and ayah
@@ -111,9 +161,141 @@ def parse_verse_command(command_text):
         surah = int(parts[0])
         ayah = int(parts[1])
         
-        if not (1 <= surah <= 114):
+        if not (1 <= surah <= SURAH_COUNT):
+            return None, None
+        
+        if not (1 <= ayah <= verse_count(surah)):
             return None, None
             
         return surah, ayah
     except ValueError:
         return None, None
+
+def parse_verse_references(command_text):
+    """
+    Parse one or more verse references
+    
+    Accepts single verses ("2:255"), ranges ("2:255-257"), whole surahs
+    ("112") and comma separated lists of these ("1:1,2:255-257,112").
+    
+    Args:
+        command_text (str): Command text
+        
+    Returns:
+        list: (surah, first_ayah, last_ayah) tuples, or None if any part
+            is invalid or the total exceeds MAX_REFERENCE_VERSES
+    """
+    references = []
+    total = 0
+    
+    try:
+        for part in command_text.replace(' ', '').split(','):
+            if not part:
+                continue
+            
+            if ':' in part:
+                surah_text, ayah_text = part.split(':', 1)
+                surah = int(surah_text)
+                if '-' in ayah_text:
+                    first_text, last_text = ayah_text.split('-', 1)
+                    first, last = int(first_text), int(last_text)
+                else:
+                    first = last = int(ayah_text)
+            else:
+                surah = int(part)
+                first, last = 1, verse_count(surah)
+            
+            if not (1 <= surah <= SURAH_COUNT):
+                return None
+            if not (1 <= first <= last <= verse_count(surah)):
+                return None
+            
+            total += last - first + 1
+            if total > MAX_REFERENCE_VERSES:
+                return None
+            references.append((surah, first, last))
+    except ValueError:
+        return None
+    
+    return references or None
+
+def split_lines(text, limit=MESSAGE_LIMIT):
+    """
+    Split a long text into chunks at line boundaries
+    
+    Markdown entities of format_verse_message never span lines, so every chunk
+    stays valid Markdown. A single line longer than limit is split at
+    spaces, and only a line without spaces is cut mid-word.
+    
+    Args:
+        text (str): Text to split
+        limit (int): Maximum chunk length
+        
+    Returns:
+        list: Chunks, each at most limit characters long
+    """
+    chunks = []
+    current = ""
+    
+    for line in text.split("\n"):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit + 1)
+            if cut <= 0:
+                cut = limit
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip(" ")
+        
+        if not current:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+        else:
+            chunks.append(current)
+            current = line
+    
+    if current:
+        chunks.append(current)
+    
+    return chunks
+
+def pack_messages(parts, separator="\n\n", limit=MESSAGE_LIMIT):
+    """
+    Pack formatted parts into as few Telegram messages as possible
+    
+    Parts are never split inside a line, see split_lines.
+    
+    Args:
+        parts (list): Formatted message parts, kept in order
+        separator (str): Text placed between parts of one message
+        limit (int): Maximum message length
+        
+    Returns:
+        list: Message texts, each at most limit characters long
+    """
+    messages = []
+    current = ""
+    
+    for part in parts:
+        # A single oversized part is split on its own
+        if len(part) > limit:
+            if current:
+                messages.append(current)
+            *chunks, part = split_lines(part, limit)
+            messages.extend(chunks)
+            current = ""
+        
+        if not current:
+            current = part
+        elif len(current) + len(separator) + len(part) <= limit:
+            current += separator + part
+        else:
+            messages.append(current)
+            current = part
+    
+    if current:
+        messages.append(current)
+    
+    return messages